@@ -0,0 +1,162 @@
+"""Uyarlanabilir karşılaştırma modu: en bilgilendirici çifti sırayla sorar"""
+from functools import lru_cache
+
+import numpy as np
+
+from ahp import MISSING, SAATY_SCALE, get_layout
+from criteria import DEFAULT_SURVEY
+from partial import PRIOR_LOG_STD, estimate_codes
+
+# Uyarlanabilir mod yalnızca bu sayıda ve daha fazla kriteri olan aşamalarda
+MIN_CRITERIA = 6
+
+# Durma ölçütü: her kriterin log ağırlığının, tüm çiftler yanıtlansaydı
+# bulunacak tahminden beklenen sapması (≈ göreli ağırlık farkı) bu değerin
+# altına inince dur. Oturumu ~25 dakikadan 10 dakikanın altına indirecek
+# biçimde benchmarks/adaptive_accuracy.py ile ayarlandı (gürültü 0.2-0.6):
+# 15 kriterli aşamada 105 yerine ~31-44 soru, 7 kriterlide 21 yerine ~11-13.
+# Bedeli: tam matristen medyan fark ~%9-14; gerçek ağırlıklara hata tam
+# matrisin ~1.2-1.9 katı. Bu, soru sayısından kaynaklanır (hata √L⁺ ile
+# ölçeklenir); seçim kuralı değiştirilerek giderilemez.
+MAX_REMAINING_STD = 0.20
+
+# Yargı gürültüsü kestiriminde önsel değerin (PRIOR_LOG_STD) serbestlik derecesi
+PRIOR_DOF = 10
+
+# Arayüz ölçeğinin (eşit, 3, 5, 7) log değerleri; benzetimde yuvarlama için
+LOG_SCALE = np.log(SAATY_SCALE)
+
+
+def is_adaptive_stage(stage_key, survey_id=DEFAULT_SURVEY):
+    """Aşamada uyarlanabilir seçim anlamlı mı?"""
+    return get_layout(stage_key, survey_id).n >= MIN_CRITERIA
+
+
+def laplacian(n, rows, cols):
+    """Yanıtlanan çiftlerin karşılaştırma grafiği Laplace matrisi"""
+    lap = np.zeros((n, n))
+    np.add.at(lap, (rows, rows), 1.0)
+    np.add.at(lap, (cols, cols), 1.0)
+    np.add.at(lap, (rows, cols), -1.0)
+    np.add.at(lap, (cols, rows), -1.0)
+    return lap
+
+
+def components(n, rows, cols):
+    """Grafiğin bağlı bileşen etiketleri"""
+    labels = list(range(n))
+
+    def find(x):
+        while labels[x] != x:
+            labels[x] = labels[labels[x]]
+            x = labels[x]
+        return x
+
+    for i, j in zip(rows, cols):
+        labels[find(i)] = find(j)
+    return np.array([find(x) for x in range(n)])
+
+
+class AdaptiveSelector:
+    """Bir aşama için soru sırasını ve durma kararını tutar.
+
+    Durma kararı yalnızca şimdiye kadarki yanıtlara bağlıdır; günlükten geri
+    yüklenen oturumda aynı yanıtlar aynı kararı verir.
+    """
+
+    def __init__(self, stage_key, survey_id=DEFAULT_SURVEY):
+        self.stage_key = stage_key
+        self.survey_id = survey_id
+        self.order = []
+        self.finished = False
+
+    def remaining_std(self, codes, pinv):
+        """Kriter başına, tüm çiftler yanıtlanınca log ağırlığın beklenen değişimi.
+
+        İç içe LLS tahminlerinde Var(x_m - x_tam) = σ² (L_m⁺ - L_tam⁺) olur;
+        tam grafikte L⁺ köşegeni (n - 1) / n²'dir. σ, partial.estimate_codes
+        artıklarından önsel değerle harmanlanarak kestirilir.
+        """
+        layout = get_layout(self.stage_key, self.survey_id)
+        n = layout.n
+        stage_codes = np.full(layout.n_pairs, MISSING, dtype=np.int8)
+        stage_codes[list(codes)] = list(codes.values())
+        estimate = estimate_codes(self.stage_key, stage_codes, self.survey_id)
+
+        dof = int(estimate.n_answered[0]) - (n - 1)
+        residual_var = estimate.residual_std[0] ** 2 if dof > 0 else 0.0
+        sigma2 = (dof * residual_var + PRIOR_DOF * PRIOR_LOG_STD ** 2) / (dof + PRIOR_DOF)
+        return np.sqrt(sigma2 * np.clip(np.diagonal(pinv) - (n - 1) / n ** 2, 0.0, None))
+
+    def select_next(self, codes):
+        """Sıradaki çiftin konumunu seç; tahmin yeterince kesinse None döndür.
+
+        codes: {çift konumu: işaretli kod} biçiminde şimdiye kadarki yanıtlar.
+        """
+        layout = get_layout(self.stage_key, self.survey_id)
+        n = layout.n
+        positions = np.array(sorted(codes), dtype=np.intp)
+        rows, cols = layout.rows[positions], layout.cols[positions]
+
+        labels = components(n, rows, cols)
+        degree = np.bincount(np.concatenate([rows, cols]), minlength=n)
+        connected = len(set(labels.tolist())) == 1
+
+        pinv = np.linalg.pinv(laplacian(n, rows, cols)) if connected else None
+        if connected and self.remaining_std(codes, pinv).max() < MAX_REMAINING_STD:
+            self.finished = True
+            return None
+
+        unanswered = np.array(
+            [p for p in range(layout.n_pairs) if p not in codes], dtype=np.intp)
+        if not len(unanswered):
+            self.finished = True
+            return None
+
+        # Bilgi ölçütü: iki kriter arasındaki etkin direnç, yani LLS
+        # tahmininde log(w_i / w_j) varyansı; farklı bileşenler için sonsuz
+        i, j = layout.rows[unanswered], layout.cols[unanswered]
+        if connected:
+            resistance = pinv[i, i] + pinv[j, j] - 2 * pinv[i, j]
+        else:
+            resistance = np.where(labels[i] != labels[j], np.inf, 0.0)
+
+        # Eşitlikte az karşılaştırılmış kriterleri öne al
+        best = np.lexsort((degree[i] + degree[j], -resistance))[0]
+        position = int(unanswered[best])
+        self.order.append(position)
+        return position
+
+
+def simulate_codes(layout, weights, noise, rng):
+    """Sanal uzman: gürültülü log oranları en yakın ölçek basamağına yuvarla"""
+    log_ratio = np.log(weights[layout.rows] / weights[layout.cols])
+    log_ratio += rng.normal(0.0, noise, layout.n_pairs)
+    magnitude = np.abs(np.abs(log_ratio)[:, np.newaxis] - LOG_SCALE).argmin(axis=1)
+    return (np.sign(log_ratio) * magnitude).astype(np.int8)
+
+
+def simulate_session(stage_key, codes, survey_id=DEFAULT_SURVEY):
+    """Seçicinin sorduğu çiftleri verilen kodlarla yanıtla; yanıtlanan kod dizisini döndür"""
+    selector = AdaptiveSelector(stage_key, survey_id)
+    answered = {}
+    while (position := selector.select_next(answered)) is not None:
+        answered[position] = int(codes[position])
+    partial_codes = np.full(len(codes), MISSING, dtype=np.int8)
+    partial_codes[list(answered)] = list(answered.values())
+    return partial_codes
+
+
+@lru_cache(maxsize=None)
+def expected_questions(stage_key, survey_id=DEFAULT_SURVEY, n_experts=20, seed=0):
+    """Süre tahmini için sanal uzmanlarla ortalama soru sayısı (yuvarlanmış)"""
+    layout = get_layout(stage_key, survey_id)
+    if not is_adaptive_stage(stage_key, survey_id):
+        return layout.n_pairs
+    rng = np.random.default_rng(seed)
+    asked = [
+        (simulate_session(stage_key, simulate_codes(layout, weights, PRIOR_LOG_STD, rng), survey_id)
+         != MISSING).sum()
+        for weights in rng.dirichlet(np.full(layout.n, 2.0), size=n_experts)
+    ]
+    return int(round(float(np.mean(asked))))
@@ -0,0 +1,72 @@
+"""Yönetici sayfası: parola korumalı canlı sonuçlar ve ölçümler (?yonetim adresiyle açılır)"""
+import hmac
+
+import streamlit as st
+
+from dashboard import results_dashboard
+from metrics import BUCKETS, get_recorder
+
+
+def check_admin_password():
+    """secrets'taki admin_password ile giriş; parola tanımlı değilse sayfa kapalı"""
+    password = st.secrets.get("admin_password", None)
+    if not password:
+        st.error("Yönetici sayfası yapılandırılmamış (admin_password tanımlı değil).")
+        return False
+    if st.session_state.get('admin_authenticated', False):
+        return True
+
+    entered = st.text_input("🔑 Yönetici parolası:", type="password")
+    if st.button("Giriş"):
+        if hmac.compare_digest(entered.encode(), str(password).encode()):
+            st.session_state.admin_authenticated = True
+            st.rerun()
+        st.error("Parola hatalı.")
+    return False
+
+
+def display_metrics():
+    """İşlem başına gecikme özeti ve seçilen işlemin histogramı"""
+    summary = get_recorder().summary()
+    if not summary:
+        st.info("Henüz ölçüm yok.")
+        return
+
+    st.dataframe(
+        [
+            {
+                "İşlem": name,
+                "Sayı": stats["count"],
+                "Hata": stats["errors"],
+                "p50 (ms)": round(stats["p50"] * 1000, 1),
+                "p95 (ms)": round(stats["p95"] * 1000, 1),
+                "p99 (ms)": round(stats["p99"] * 1000, 1),
+            }
+            for name, stats in summary.items()
+        ],
+        hide_index=True,
+    )
+
+    operation = st.selectbox("Histogram:", list(summary))
+    cumulative = summary[operation]["buckets"] + [summary[operation]["count"]]
+    labels = [f"≤{bound * 1000:g} ms" for bound in BUCKETS] + [f">{BUCKETS[-1] * 1000:g} ms"]
+    counts = [cumulative[0]] + [b - a for a, b in zip(cumulative, cumulative[1:])]
+    # Etiket sırası korunsun diye sıra numarasıyla başlatılır
+    st.bar_chart({"Kova": [f"{k:02d} {label}" for k, label in enumerate(labels)], "Ölçüm": counts},
+                 x="Kova", y="Ölçüm")
+
+
+def admin_page():
+    """Yönetici sayfası"""
+    st.title("🛠️ Yönetim")
+    if not check_admin_password():
+        return
+
+    results_tab, metrics_tab = st.tabs(["📈 Canlı Grup Sonuçları", "⏱️ Gecikme Ölçümleri"])
+    with results_tab:
+        results_dashboard()
+    with metrics_tab:
+        st.caption("Bu süreçteki son ölçümler; aynı veriler Prometheus metin dosyasına da yazılır.")
+        if st.button("🔄 Yenile"):
+            st.rerun()
+        display_metrics()
@@ -0,0 +1,188 @@
+"""Grup kararı: bireysel yargıların (AIJ) ve önceliklerin (AIP) birleştirilmesi"""
+from collections import OrderedDict
+from typing import NamedTuple
+
+import numpy as np
+
+from ahp import (MISSING, STAGES, codes_to_log_values, consistency, evaluate_codes,
+                 get_layout, principal_eigenvector)
+from partial import estimate_codes
+
+# Bellekte tutulan en fazla sonuç kümesi
+MEMO_SIZE = 8
+
+
+def normalize_org(expert_org):
+    """Kurum adlarını ağırlık tablosunda eşleştirmek için sadeleştir"""
+    return (expert_org or "").strip().casefold()
+
+
+def individual_priorities(stage_key, codes):
+    """(uzman x çift) kodlardan bireysel öncelikler.
+
+    Tam yanıtlılarda özvektör, karşılaştırma grafiği bağlı kısmi yanıtlılarda
+    (uyarlanabilir mod, yarım bırakılan) LLS tahmini; diğer satırlar NaN.
+    """
+    codes = np.asarray(codes)
+    evaluated = evaluate_codes(stage_key, codes)
+    estimate = estimate_codes(stage_key, codes)
+    partial = ~evaluated.complete & estimate.connected & (estimate.n_answered > 0)
+    weights = evaluated.weights.copy()
+    weights[partial] = estimate.weights[partial]
+    return weights, evaluated
+
+
+class AggregateResult(NamedTuple):
+    """Bir aşamanın grup sonucu"""
+    aij_weights: np.ndarray    # Yargıların geometrik ortalamasından özvektör
+    aij_cr: float
+    aip_geometric: np.ndarray  # Önceliklerin ağırlıklı geometrik ortalaması
+    aip_arithmetic: np.ndarray  # Önceliklerin ağırlıklı aritmetik ortalaması
+    n_experts: int             # AIP'ye giren uzman sayısı
+    n_partial: int             # Bunlardan kısmi yanıtla (LLS tahminiyle) girenler
+
+
+class StageAccumulator:
+    """Bir aşama için ağırlıklı log-toplam biriktiricileri.
+
+    Ekleme ve çıkarma O(n²): çift başına log-toplam ve ağırlık toplamı ile
+    önceliği hesaplanabilen (tam ya da bağlı kısmi) değerlendirmelerin
+    öncelik toplamları güncellenir. Kesirli
+    kurum ağırlıklarında çıkarma kayan nokta artığı bırakır; bu yüzden
+    boşluk kontrolleri tamsayı yanıt sayılarıyla yapılır ve sayı sıfıra
+    inince toplamlar tam sıfırlanır.
+    """
+
+    def __init__(self, stage_key):
+        layout = get_layout(stage_key)
+        self.stage_key = stage_key
+        self.log_sum = np.zeros(layout.n_pairs)
+        self.weight_sum = np.zeros(layout.n_pairs)
+        self.answer_count = np.zeros(layout.n_pairs, dtype=np.int64)
+        self.log_priority_sum = np.zeros(layout.n)
+        self.priority_sum = np.zeros(layout.n)
+        self.priority_weight = 0.0
+        self.n_experts = 0
+        self.n_partial = 0
+
+    def _apply(self, codes, weight, sign, priorities=None):
+        answered = codes != MISSING
+        log_values = codes_to_log_values(codes)
+        self.log_sum[answered] += sign * weight * log_values[answered]
+        self.weight_sum[answered] += sign * weight
+        self.answer_count[answered] += sign
+        empty = self.answer_count == 0
+        self.log_sum[empty] = 0.0
+        self.weight_sum[empty] = 0.0
+
+        # AIP: tam ya da grafiği bağlı kısmi değerlendirmeler
+        if priorities is None:
+            priorities = individual_priorities(self.stage_key, codes[np.newaxis])[0][0]
+        if not np.isnan(priorities).any():
+            self.log_priority_sum += sign * weight * np.log(priorities)
+            self.priority_sum += sign * weight * priorities
+            self.priority_weight += sign * weight
+            self.n_experts += sign
+            self.n_partial += sign * (not answered.all())
+            if not self.n_experts:
+                self.log_priority_sum[:] = 0.0
+                self.priority_sum[:] = 0.0
+                self.priority_weight = 0.0
+
+    def add(self, codes, weight=1.0, priorities=None):
+        self._apply(np.asarray(codes), weight, 1, priorities)
+
+    def remove(self, codes, weight=1.0, priorities=None):
+        self._apply(np.asarray(codes), weight, -1, priorities)
+
+    def result(self):
+        layout = get_layout(self.stage_key)
+        nan_weights = np.full(layout.n, np.nan)
+
+        # AIJ: her çift en az bir uzman tarafından yanıtlanmış olmalı
+        aij_weights, aij_cr = nan_weights, float("nan")
+        if (self.answer_count > 0).all() and (self.weight_sum > 0).all():
+            mean_log = self.log_sum / self.weight_sum
+            matrix = np.ones((1, layout.n, layout.n))
+            matrix[0, layout.rows, layout.cols] = np.exp(mean_log)
+            matrix[0, layout.cols, layout.rows] = np.exp(-mean_log)
+            weights, lambda_max = principal_eigenvector(matrix)
+            aij_weights = weights[0]
+            aij_cr = float(consistency(lambda_max, layout.n)[1][0])
+
+        aip_geometric, aip_arithmetic = nan_weights, nan_weights
+        if self.n_experts and self.priority_weight > 0:
+            aip_geometric = np.exp(self.log_priority_sum / self.priority_weight)
+            aip_geometric /= aip_geometric.sum()
+            aip_arithmetic = self.priority_sum / self.priority_weight
+
+        return AggregateResult(aij_weights, aij_cr, aip_geometric, aip_arithmetic,
+                               self.n_experts, self.n_partial)
+
+
+class GroupAggregator:
+    """Tüm aşamalar için artımlı grup birleştirme.
+
+    org_weights: {kurum adı: ağırlık}; listede olmayan kurumlar default_weight alır.
+    Sonuçlar değerlendirme kimlikleri kümesine göre bellekte tutulur.
+    """
+
+    def __init__(self, org_weights=None, default_weight=1.0, stages=STAGES):
+        self.org_weights = {normalize_org(k): v for k, v in (org_weights or {}).items()}
+        self.default_weight = default_weight
+        self.stages = {stage: StageAccumulator(stage) for stage in stages}
+        self.submissions = {}
+        self._memo = OrderedDict()
+
+    def weight_for(self, expert_org):
+        return self.org_weights.get(normalize_org(expert_org), self.default_weight)
+
+    def add(self, submission_id, stage_codes, expert_org="", priorities=None):
+        """Bir değerlendirme ekle; aynı kimlik yeniden gelirse eskisinin yerine geçer"""
+        if submission_id in self.submissions:
+            self.remove(submission_id)
+        weight = self.weight_for(expert_org)
+        stage_codes = {s: np.asarray(stage_codes[s], dtype=np.int8) for s in self.stages}
+        priorities = {
+            s: individual_priorities(s, stage_codes[s][np.newaxis])[0][0]
+            if (priorities or {}).get(s) is None else priorities[s]
+            for s in self.stages
+        }
+        for stage, accumulator in self.stages.items():
+            accumulator.add(stage_codes[stage], weight, priorities[stage])
+        self.submissions[submission_id] = (stage_codes, weight, priorities)
+
+    def add_many(self, submission_ids, codes_by_stage, expert_orgs):
+        """Kod matrislerinden (satır = değerlendirme) toplu ekle.
+
+        Bireysel öncelikler aşama başına tek toplu AHP ve LLS çağrısıyla
+        hesaplanır; tam yanıtlıların AHP sonuçları (ağırlık, CR) aşama başına
+        döndürülür.
+        """
+        computed = {s: individual_priorities(s, codes_by_stage[s]) for s in self.stages}
+        for row, (submission_id, expert_org) in enumerate(zip(submission_ids, expert_orgs)):
+            self.add(submission_id,
+                     {s: codes_by_stage[s][row] for s in self.stages},
+                     expert_org,
+                     {s: computed[s][0][row] for s in self.stages})
+        return {s: evaluated for s, (_, evaluated) in computed.items()}
+
+    def remove(self, submission_id):
+        stage_codes, weight, priorities = self.submissions.pop(submission_id)
+        for stage, accumulator in self.stages.items():
+            accumulator.remove(stage_codes[stage], weight, priorities[stage])
+        # Kimlik farklı içerikle geri gelebilir; eski sonuçlar geçersiz
+        self._memo.clear()
+
+    def results(self):
+        """Aşama başına grup sonuçları; aynı değerlendirme kümesi için yeniden hesaplanmaz"""
+        key = frozenset(self.submissions)
+        if key in self._memo:
+            self._memo.move_to_end(key)
+            return self._memo[key]
+
+        results = {stage: acc.result() for stage, acc in self.stages.items()}
+        self._memo[key] = results
+        if len(self._memo) > MEMO_SIZE:
+            self._memo.popitem(last=False)
+        return results
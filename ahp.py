@@ -0,0 +1,186 @@
+"""AHP ağırlık motoru: kayıtlı yanıtları toplu karşılıklı matrislere çevirir"""
+import itertools
+from functools import lru_cache
+from typing import NamedTuple
+
+import numpy as np
+
+from criteria import DEFAULT_SURVEY, load_survey
+
+# Varsayılan ankette ağırlık hesaplanan aşamalar (tanım sırasıyla)
+STAGES = load_survey(DEFAULT_SURVEY).stages
+
+# stage_comparison kriterlerinin (a, b, c) karşılık geldiği aşamalar
+SUBSTAGES = load_survey(DEFAULT_SURVEY).substages
+
+# Arayüzdeki önem derecesinin (0: eşit, 1: zayıf, 2: orta, 3: çok güçlü)
+# Saaty ölçeğindeki karşılığı
+SAATY_SCALE = np.array([1.0, 3.0, 5.0, 7.0])
+
+# Yanıtlanmamış çift kodu (int8 aralığının dışında kalan tek değer)
+MISSING = -128
+
+# Saaty rastgele tutarlılık indeksi, n = 0..15
+RANDOM_INDEX = np.array([
+    0.0, 0.0, 0.0, 0.58, 0.90, 1.12, 1.24, 1.32,
+    1.41, 1.45, 1.49, 1.51, 1.48, 1.56, 1.57, 1.59,
+])
+
+# Kabul edilebilir tutarlılık oranı üst sınırı
+CR_THRESHOLD = 0.1
+
+
+class StageLayout:
+    """Bir aşamanın çift tablosu: pair_key sırası ve matris indeksleri"""
+
+    def __init__(self, stage_key, criteria_list):
+        self.stage_key = stage_key
+        self.letters = [c[0] for c in criteria_list]
+        self.n = len(criteria_list)
+        self.pairs = list(itertools.combinations(criteria_list, 2))
+        self.pair_keys = [f"{a[0]}_{b[0]}" for a, b in self.pairs]
+        self.pair_index = {key: p for p, key in enumerate(self.pair_keys)}
+        self.n_pairs = len(self.pairs)
+
+        index_pairs = list(itertools.combinations(range(self.n), 2))
+        self.rows = np.array([i for i, _ in index_pairs], dtype=np.intp)
+        self.cols = np.array([j for _, j in index_pairs], dtype=np.intp)
+
+        # (i < j < k) üçlüleri; oturumlar üçlü hatalarını bu sırayla dizide tutar
+        self.triads = list(itertools.combinations(range(self.n), 3))
+        self.triad_index = {triad: t for t, triad in enumerate(self.triads)}
+
+        # (pair_key, yanıt) -> kod; çözümleme sırasında tek sözlük araması yeterli
+        self.code_lookup = {}
+        for key, (a, b) in zip(self.pair_keys, self.pairs):
+            self.code_lookup[(key, "0")] = 0
+            for importance in (1, 2, 3):
+                self.code_lookup[(key, f"{importance}{a[0]}")] = importance
+                self.code_lookup[(key, f"{importance}{b[0]}")] = -importance
+
+
+@lru_cache(maxsize=None)
+def get_layout(stage_key, survey_id=DEFAULT_SURVEY):
+    """Aşama düzenini anket ve süreç başına bir kez oluştur"""
+    return StageLayout(stage_key, load_survey(survey_id).criteria[stage_key]["criteria"])
+
+
+def code_to_response(code, letter_a, letter_b):
+    """İşaretli kodu '2a' / '0' biçimindeki yanıta çevir"""
+    if code == 0:
+        return "0"
+    return f"{code}{letter_a}" if code > 0 else f"{-code}{letter_b}"
+
+
+def decode_responses(stage_key, submissions, survey_id=DEFAULT_SURVEY):
+    """Yanıt sözlüklerini (uzman x çift) int8 kod matrisine çevir"""
+    layout = get_layout(stage_key, survey_id)
+    lookup = layout.code_lookup
+    pair_index = layout.pair_index
+
+    # Satırlar önce Python listesinde doldurulur; numpy'a tek seferde aktarılır
+    empty_row = [MISSING] * layout.n_pairs
+    rows = []
+    for responses in submissions:
+        row = empty_row.copy()
+        for pair_key, response in (responses.get(stage_key) or {}).items():
+            code = lookup.get((pair_key, response))
+            if code is not None:
+                row[pair_index[pair_key]] = code
+        rows.append(row)
+    return np.array(rows, dtype=np.int8).reshape(len(submissions), layout.n_pairs)
+
+
+def codes_to_log_values(codes):
+    """Kodları log(a_ij) değerlerine çevir; eksik çiftler NaN olur"""
+    codes = np.asarray(codes, dtype=np.int16)
+    missing = codes == MISSING
+    magnitude = np.where(missing, 0, np.abs(codes))
+    log_values = np.sign(codes) * np.log(SAATY_SCALE[magnitude])
+    return np.where(missing, np.nan, log_values)
+
+
+def codes_to_matrices(stage_key, codes, survey_id=DEFAULT_SURVEY):
+    """Kodlardan (uzman x n x n) karşılıklı matris yığını oluştur"""
+    layout = get_layout(stage_key, survey_id)
+    values = np.exp(codes_to_log_values(codes))
+
+    matrices = np.ones(values.shape[:-1] + (layout.n, layout.n))
+    matrices[..., layout.rows, layout.cols] = values
+    matrices[..., layout.cols, layout.rows] = 1.0 / values
+    return matrices
+
+
+class AHPResult(NamedTuple):
+    """Toplu AHP sonucu; eksik yanıtlı uzmanların satırları NaN"""
+    weights: np.ndarray      # (uzman x n)
+    lambda_max: np.ndarray   # (uzman,)
+    ci: np.ndarray           # (uzman,)
+    cr: np.ndarray           # (uzman,)
+    complete: np.ndarray     # (uzman,) bool
+
+
+def principal_eigenvector(matrices, tol=1e-10, max_iter=200):
+    """Yığındaki her matrisin asıl özvektörünü kuvvet yöntemiyle bul"""
+    # Satır geometrik ortalaması iyi bir başlangıç noktası
+    w = np.exp(np.log(matrices).mean(axis=-1))
+    w /= w.sum(axis=-1, keepdims=True)
+
+    # Yalnızca henüz yakınsamamış matrisler üzerinde yinele
+    active = np.arange(len(w))
+    for _ in range(max_iter):
+        new_w = np.einsum("eij,ej->ei", matrices[active], w[active])
+        new_w /= new_w.sum(axis=-1, keepdims=True)
+        still_moving = np.abs(new_w - w[active]).max(axis=-1) >= tol
+        w[active] = new_w
+        active = active[still_moving]
+        if not len(active):
+            break
+
+    lambda_max = (np.einsum("eij,ej->ei", matrices, w) / w).mean(axis=-1)
+    return w, lambda_max
+
+
+def consistency(lambda_max, n):
+    """Tutarlılık indeksi (CI) ve oranı (CR)"""
+    if n <= 2:
+        zeros = np.zeros_like(lambda_max)
+        return zeros, zeros
+    ci = (lambda_max - n) / (n - 1)
+    return ci, ci / RANDOM_INDEX[n]
+
+
+def evaluate_codes(stage_key, codes, survey_id=DEFAULT_SURVEY):
+    """Kod matrisinden tüm uzmanların ağırlık, CI ve CR değerlerini hesapla"""
+    layout = get_layout(stage_key, survey_id)
+    codes = np.asarray(codes)
+    complete = ~(codes == MISSING).any(axis=-1)
+
+    weights = np.full(codes.shape[:-1] + (layout.n,), np.nan)
+    lambda_max = np.full(codes.shape[:-1], np.nan)
+    if complete.any():
+        matrices = codes_to_matrices(stage_key, codes[complete], survey_id)
+        weights[complete], lambda_max[complete] = principal_eigenvector(matrices)
+
+    ci, cr = consistency(lambda_max, layout.n)
+    return AHPResult(weights, lambda_max, ci, cr, complete)
+
+
+def evaluate_submissions(submissions, stages=None, survey_id=DEFAULT_SURVEY):
+    """Yanıt sözlüklerinin tamamını aşama aşama tek çağrıda değerlendir (varsayılan: anketin tüm aşamaları)"""
+    return {
+        stage_key: evaluate_codes(stage_key, decode_responses(stage_key, submissions, survey_id), survey_id)
+        for stage_key in (stages or load_survey(survey_id).stages)
+    }
+
+
+def global_weights(stage_weights, survey_id=DEFAULT_SURVEY):
+    """Aşamalar arası ağırlıkları aşama içi ağırlıklarla çarpıp birleştir"""
+    survey = load_survey(survey_id)
+    if survey.comparison_stage is None:
+        raise ValueError(f"{survey_id} anketinde aşamalar arası karşılaştırma yok")
+    top = stage_weights[survey.comparison_stage]
+    return np.concatenate(
+        [top[..., k, np.newaxis] * stage_weights[stage] for k, stage in enumerate(survey.substages)],
+        axis=-1,
+    )
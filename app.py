@@ -1,94 +1,187 @@
 import streamlit as st
-import json
+from array import array
 from datetime import datetime
-import itertools
-
-# Google Sheets için
-try:
-    import gspread
-    from oauth2client.service_account import ServiceAccountCredentials
-    GOOGLE_SHEETS_AVAILABLE = True
-except ImportError:
-    GOOGLE_SHEETS_AVAILABLE = False
-
-# Sayfa yapılandırması
-st.set_page_config(
-    page_title="Net Zero Proje Değerlendirme",
-    page_icon="🌱",
-    layout="wide"
-)
-
-# Kriterleri tanımla
-CRITERIA = {
-    "stage2": {
-        "name": "2. Aşama - Tema Önceliği",
-        "criteria": [
-            ("a", "Yıllık ve kümülatif emisyon azaltım potansiyeli", "Açıklama: Projenin yıllık CO₂ azaltımına ve toplam uzun dönem katkısına ilişkin etkisi."),
-            ("b", "Modal kayma etkisi", "Açıklama: Yolculukların yüksek emisyonlu modlardan daha düşük emisyonlu modlara yönelme potansiyeli."),
-            ("c", "Trafik ve tıkanıklık azaltımı", "Açıklama: Trafik akışını iyileştirme, gecikmeleri azaltma ve yol kapasitesini daha verimli kullanma etkisi."),
-            ("d", "Toplu taşıma entegrasyonun ve erişebilirliğin artırılması", "Açıklama: Toplu taşıma kullanımını kolaylaştıran, bağlantıları güçlendiren ve erişimi artıran katkılar."),
-            ("e", "Davranışsal değişim potansiyeli", "Açıklama: Kullanıcıların daha sürdürülebilir ulaşım tercihlerine yönelmesini sağlayacak etkiler."),
-            ("f", "Aktif Mod ve Paylaşımlı Mobilite Altyapısının Kurulması", "Açıklama: Bisiklet, yaya ve paylaşımlı mobilite sistemlerine yönelik altyapı geliştirme düzeyi."),
-            ("g", "Operasyonel enerji verimliliği (kWh/pkm, kWh/tkm düşüşü) ", "Açıklama: Taşıt veya sistem düzeyinde enerji tüketiminde sağlanan düşüş (kWh/pkm, kWh/tkm)."),
-            ("h", "Yenilenebilir enerji entegrasyonu (PV, RES ile şarj, shore-power vb.) ve elektrifikasyon ", "Açıklama: Güneş, rüzgâr veya shore-power gibi temiz enerji kaynaklarının ulaşım altyapısına entegrasyonu ile elektrikli araç ve sistemleri destekleyen elektrifikasyon altyapısının geliştirilmesi."),
-            ("i", "Altyapı verimliliği", "Açıklama: Mevcut altyapının fiziksel kapasitesini ve hizmet düzeyini artıran, trafik akışını iyileştiren ve tıkanıklığı azaltan çözümler bu kriterde değerlendirilir. Ör; demiryolu sinyalizasyon modernizasyonu, limanlarda shore-power, karayolunda adaptif sinyalizasyon uygulamaları, havalimanlarında apron operasyonları optimizasyonu vb."),
-            ("j", "Ekonomik fayda / maliyet etkinliği", "Açıklama: Projenin ekonomik getirileri ile yatırım/maliyet yapısının dengesi."),
-            ("k", "Dışsallıklar (hava kalitesi, güvenlik, sağlık etkisi)", "Açıklama: Hava kalitesinin iyileşmesi, kazaların azalması ve sağlık üzerindeki genel etkiler."),
-            ("l", "İstihdam yaratma ve tedarik zinciri etkisi", "Açıklama: Yerel ekonomik katkı, yeni iş alanları ve üretim/tedarik kapasitesine katkı düzeyi."),
-            ("m", "Afetlere dayanıklı ulaştırma altyapısı ve operasyonel süreklilik", "Açıklama: Kentsel ulaşım sisteminin afet koşullarına karşı fiziksel altyapı dayanıklılığının artırılmasını, operasyon yönetiminin güçlendirilmesi."),
-            ("n", "Veri tabanlı karar alma kapasitesi ve izleme (MRV, trafik ölçümü, karbon takip)", "Açıklama: Trafik verisi, enerji tüketimi, emisyon takibi gibi veri altyapısının güçlendirilme düzeyi."),
-            ("o", "Akıllı ulaşım sistemleri entegrasyonu (ITS, sinyalizasyon, V2X vb.)", "Açıklama: Dijitalizasyon, sinyal optimizasyonu, iletişim teknolojileri ve akıllı sistem katkıları."),
-        ]
-    },
-    "stage3": {
-        "name": "3. Aşama - Olgunluk Değerlendirmesi",
-        "criteria": [
-            ("a", "CAPEX analizi mevcudiyeti", "Açıklama: Projenin sermaye yatırımı (CAPEX) kapsamında; altyapı, üstyapı, araç, ekipman, teknoloji ve inşaat maliyetlerinin detaylı biçimde analiz edilip edilmediğinin ve yatırım kararını destekleyecek finansal çerçevenin oluşturulup oluşturulmadığının değerlendirilmesi."),
-            ("b", "OPEX analizi mevcudiyeti", "Açıklama: Projenin işletme ve bakım (OPEX) maliyetlerinin; personel, enerji, bakım-onarım, yazılım lisansları, yedek parça, sigorta ve operasyon yönetimi gibi kalemler üzerinden kapsamlı biçimde analiz edilip edilmediğinin ve maliyet yapısının netleştirilip netleştirilmediğinin değerlendirilmesi."),
-            ("c", "Finansal analizin varlığı", "Açıklama: Projenin finansal fizibilitesinin ve karar sürecini destekleyecek analizlerin mevcut olup olmadığı değerlendirilir."),
-            ("d", "Risk Yönetimi Planı/Analizi Mevcudiyeti", "Açıklama: Proje risklerinin tanımlanıp yönetim stratejilerinin/analizlerinin oluşturulup oluşturulmadığını değerlendirir."),
-        ]
-    },
-    "stage4": {
-        "name": "4. Aşama - Etki ve Kalite",
-        "criteria": [
-            ("a", "Ölçek Etkisi", "Açıklama: Projenin etkilediği nüfusun ve coğrafi alanın büyüklüğünü değerlendirir."),
-            ("b", "Çevresel Etki", "Açıklama: GHProjenin çevresel etkilerini; GHG azaltımı (CO₂, CH₄, N₂O), enerji tüketimindeki düşüş ve hava kalitesindeki iyileşme (NOx, PM10, NMHC) gibi göstergeler üzerinden değerlendirir."),
-            ("c", "Zaman etkisi ", "Açıklama: Emisyon azaltımının ne zaman devreye girdiği- kısa vade etki 0-5 yıl, orta vade etki 5-10, uzun vadede etki 10+ yıl "),
-            ("d", "Çarpan Etkisi", "Açıklama: Projenin doğrudan çıktılarının ötesinde ek ekonomik, sosyal veya çevresel faydalar üretme potansiyelini değerlendirir."),
-            ("e", "İnovasyon ve sürdürülebilir uygulanabilirlik", "Açıklama: Projenin yenilikçi yönünün, farklı koşullara uyarlanabilirliğinin ve uzun vadede sürdürülebilir ve kalıcı etki üretebilecek şekilde uygulanabilir olma kapasitesinin değerlendirilmesi."),
-            ("f", "İzlenebilirlik", "Açıklama: Eylemin ilerlemesinin düzenli olarak takip edilebilmesi, süreç ve sonuç bilgilerinin şeffaf bir şekilde kayıt altına alınması ve raporlanabilir olmasıdır."),
-            ("g", "Ölçülebilirlik", "Açıklama: Eylemin başarısının nicel göstergelerle değerlendirilebilmesi, hedeflerin sayısal olarak tanımlanması ve sonuçların objektif biçimde ölçülebilmesidir."),
-        ]
-    },
-    "stage_comparison": {
-        "name": "Aşamalar Arası Karşılaştırma",
-        "criteria": [
-            ("a", "2. Aşama - Tema Önceliği", "Açıklama: Projenin hangi temaya odaklandığı ve bu temanın öncelik düzeyi."),
-            ("b", "3. Aşama - Olgunluk Değerlendirmesi", "Açıklama: Projenin teknik, finansal ve operasyonel olgunluk seviyesi."),
-            ("c", "4. Aşama - Etki ve Kalite", "Açıklama: Projenin sosyal, ekonomik, çevresel etkisi ve teknik kalitesi."),
-        ]
-    }
-}
+
+from adaptive import AdaptiveSelector, expected_questions, is_adaptive_stage
+from admin import admin_page
+from ahp import CR_THRESHOLD, MISSING, code_to_response, get_layout
+from consistency import tracker_from_codes
+from criteria import DEFAULT_SURVEY, available_surveys, load_survey
+from encoding import decode_payload, encode_codes
+from journal import get_journal, new_session_token
+from metrics import get_recorder, timed
+from partial import estimate_codes
+from sheets import GOOGLE_SHEETS_AVAILABLE, SaveTicket, get_writer
+from storage import save_record_locally
 
 # Session state başlat
-if 'responses' not in st.session_state:
-    st.session_state.responses = {}
+if 'codes' not in st.session_state:
+    st.session_state.codes = {}
 if 'expert_name' not in st.session_state:
     st.session_state.expert_name = ""
 if 'current_stage' not in st.session_state:
     st.session_state.current_stage = "welcome"
+# Anket adres parametresiyle seçilir (?anket=<kimlik>); oturum boyunca değişmez
+if 'survey_id' not in st.session_state:
+    st.session_state.survey_id = st.query_params.get("anket", DEFAULT_SURVEY)
+
+# Tahmini süre hesabında karşılaştırma başına saniye
+SECONDS_PER_COMPARISON = 10
+
+def get_survey():
+    """Oturumun anketi; tanım ve çift tabloları süreç başına bir kez derlenir"""
+    return load_survey(st.session_state.survey_id)
+
+def stage_layout(stage):
+    """Oturumun anketindeki aşama düzeni (paylaşılan, önbellekli)"""
+    return get_layout(stage, st.session_state.survey_id)
+
+def journal_write(method, *args, **kwargs):
+    """Oturum günlüğüne yaz; günlük hatası değerlendirmeyi durdurmaz"""
+    token = st.session_state.get('session_token')
+    if not token:
+        return
+    try:
+        getattr(get_journal(), method)(token, *args, **kwargs)
+    except Exception as e:
+        print(f"Günlük kayıt hatası: {e}")
+
+def set_pair_idx(stage, pair_idx):
+    """Aşamadaki konumu güncelle ve günlüğe yaz"""
+    st.session_state[f'pair_idx_{stage}'] = pair_idx
+    journal_write('record_position', stage, pair_idx)
+    
+    selector = get_adaptive_selector(stage)
+    if selector is not None:
+        journal_write('record_adaptive', stage, selector.order, selector.finished)
+
+def mark_auto_saved():
+    """Otomatik kaydın yapıldığını oturuma ve günlüğe işle"""
+    st.session_state.auto_saved = True
+    journal_write('record_meta', auto_saved=True)
+
+def restore_session(token):
+    """Günlükteki oturumu (yanıtlar ve pair_idx_* konumları) geri yükle"""
+    try:
+        session = get_journal().load(token)
+    except Exception as e:
+        print(f"Günlük okuma hatası: {e}")
+        return False
+    if session is None:
+        return False
+    
+    meta = session["meta"]
+    try:
+        load_survey(meta.get("survey_id", DEFAULT_SURVEY))
+    except ValueError as e:
+        print(f"Günlükteki anket yüklenemedi: {e}")
+        return False
+    st.session_state.survey_id = meta.get("survey_id", DEFAULT_SURVEY)
+    st.session_state.session_token = token
+    st.session_state.expert_name = meta.get("expert_name", "")
+    st.session_state.expert_org = meta.get("expert_org", "")
+    st.session_state.adaptive_mode = meta.get("adaptive_mode", False)
+    st.session_state.auto_saved = meta.get("auto_saved", False)
+    st.session_state.codes = {}
+    st.session_state.pop('saved_payload', None)
+    for stage, stage_responses in session["responses"].items():
+        layout = stage_layout(stage)
+        codes = get_stage_codes(stage)
+        for pair_key, response in stage_responses.items():
+            codes[layout.pair_index[pair_key]] = layout.code_lookup[(pair_key, response)]
+    
+    for stage, pair_idx in session["positions"].items():
+        st.session_state[f'pair_idx_{stage}'] = pair_idx
+    for stage, state in session["adaptive"].items():
+        selector = AdaptiveSelector(stage, st.session_state.survey_id)
+        selector.order = state["order"]
+        selector.finished = state["finished"]
+        st.session_state[f'adaptive_{stage}'] = selector
+    
+    st.session_state.current_stage = get_survey().stages[0]
+    return True
+
+def is_evicted():
+    """Oturum kalıcı kayıttan sonra sıkıştırılmış kayda indirildi mi?"""
+    return 'saved_payload' in st.session_state
+
+def get_stage_codes(stage):
+    """Aşamanın yanıt kodları: çift konumu sırasıyla sabit boyutlu int8 dizisi"""
+    if is_evicted():
+        # Boşaltılmış oturum: kodlar saklanan kayıttan geçici olarak çözülür
+        payload = decode_payload(st.session_state.saved_payload, st.session_state.survey_id)
+        return array('b', payload[stage].tobytes())
+    codes = st.session_state.codes
+    if stage not in codes:
+        codes[stage] = array('b', [MISSING]) * stage_layout(stage).n_pairs
+    return codes[stage]
+
+def answered_count(stage):
+    """Aşamada yanıtlanmış çift sayısı"""
+    codes = get_stage_codes(stage)
+    return len(codes) - codes.count(MISSING)
 
-def generate_pairs(criteria_list):
-    """Tüm kriter çiftlerini oluştur"""
-    return list(itertools.combinations(criteria_list, 2))
+def get_consistency_tracker(stage):
+    """Aşamanın tutarlılık takipçisini getir (yoksa yanıtlardan oluştur)"""
+    tracker_key = f'consistency_{stage}'
+    if tracker_key not in st.session_state:
+        st.session_state[tracker_key] = tracker_from_codes(
+            stage, get_stage_codes(stage), st.session_state.survey_id)
+    return st.session_state[tracker_key]
 
-def save_response(stage, pair_key, response):
+@timed("save_response")
+def save_response(stage, pair_pos, code):
     """Yanıtı kaydet"""
-    if stage not in st.session_state.responses:
-        st.session_state.responses[stage] = {}
-    st.session_state.responses[stage][pair_key] = response
+    get_stage_codes(stage)[pair_pos] = code
+    
+    # Günlük okunabilir "2a" biçimini korur
+    layout = stage_layout(stage)
+    criterion_a, criterion_b = layout.pairs[pair_pos]
+    journal_write('record_answer', stage, layout.pair_keys[pair_pos],
+                  code_to_response(code, criterion_a[0], criterion_b[0]))
+    
+    # Tutarlılık takipçisini yalnızca bu çift için güncelle
+    get_consistency_tracker(stage).update(
+        int(layout.rows[pair_pos]), int(layout.cols[pair_pos]), code)
 
+def display_consistency_warning(stage_key):
+    """Tahmini CR eşiği aşarsa uyarı göster"""
+    tracker = get_consistency_tracker(stage_key)
+    approx_cr = tracker.approx_cr()
+    if approx_cr is None or approx_cr <= CR_THRESHOLD:
+        return
+    
+    triads = ", ".join("-".join(triad) for triad in tracker.worst_triads())
+    st.warning(
+        f"⚠️ Yanıtlarınız tutarsız görünüyor (tahmini CR: {approx_cr:.2f}, "
+        f"önerilen üst sınır: {CR_THRESHOLD:.2f}). "
+        f"En çelişkili kriter üçlüleri: **{triads}**. "
+        "İsterseniz 'Önceki' ile geri dönüp yanıtlarınızı gözden geçirebilirsiniz."
+    )
+
+def get_adaptive_selector(stage):
+    """Uyarlanabilir modda aşamanın soru seçicisini getir; mod kapalıysa None"""
+    survey_id = st.session_state.survey_id
+    if not st.session_state.get('adaptive_mode', False) or not is_adaptive_stage(stage, survey_id):
+        return None
+    selector_key = f'adaptive_{stage}'
+    if selector_key not in st.session_state:
+        st.session_state[selector_key] = AdaptiveSelector(stage, survey_id)
+    return st.session_state[selector_key]
+
+def get_answered_codes(stage):
+    """Aşamanın yanıtlarını {çift konumu: kod} olarak döndür"""
+    return {p: code for p, code in enumerate(get_stage_codes(stage)) if code != MISSING}
+
+def stage_completed(stage):
+    """Aşama tüm çiftlerle ya da uyarlanabilir modda erken durmayla bitti mi?"""
+    # Yalnızca tamamlanıp kaydedilmiş oturumlar boşaltılır
+    if is_evicted() or answered_count(stage) == stage_layout(stage).n_pairs:
+        return True
+    selector = get_adaptive_selector(stage)
+    return selector is not None and selector.finished
+
+@timed("check_and_auto_save")
 def check_and_auto_save():
     """Tüm aşamalar tamamlandıysa otomatik kaydet"""
     # Zaten kaydedildi mi kontrol et
@@ -96,41 +189,95 @@ def check_and_auto_save():
         return
     
     # Tüm aşamalar tamamlandı mı?
-    all_completed = (
-        'stage2' in st.session_state.responses and 
-        len(st.session_state.responses['stage2']) == 105 and  # 15 kriter: C(15,2) = 105
-        'stage3' in st.session_state.responses and 
-        len(st.session_state.responses['stage3']) == 6 and   # 4 kriter: C(4,2) = 6
-        'stage4' in st.session_state.responses and 
-        len(st.session_state.responses['stage4']) == 21 and   # 7 kriter: C(7,2) = 21
-        'stage_comparison' in st.session_state.responses and 
-        len(st.session_state.responses['stage_comparison']) == 3  # 3 aşama: C(3,2) = 3
-    )
+    all_completed = all(stage_completed(stage) for stage in get_survey().stages)
     
     if all_completed:
         # Otomatik kaydet
         success = save_results_to_server()
         if success:
-            st.session_state.auto_saved = True
+            mark_auto_saved()
 
-def display_comparison(stage_key, pair_idx):
-    """Kriter karşılaştırma arayüzü"""
-    stage_data = CRITERIA[stage_key]
-    criteria_list = stage_data["criteria"]
-    pairs = generate_pairs(criteria_list)
+# Tercih radyosunun seçenekleri (birinci kriter, eşit, ikinci kriter) ve
+# varsayılan önem derecesi; aşama başına tek radyo/kaydırıcı anahtarı kullanılır
+CHOICE_A, CHOICE_EQUAL, CHOICE_B = 0, 1, 2
+DEFAULT_IMPORTANCE = 2
+
+def sync_widgets(stage_key, pair_pos):
+    """Aşamanın radyo ve kaydırıcısını gösterilen çiftin kayıtlı yanıtına ayarla"""
+    choice_key = f"choice_{stage_key}"
+    importance_key = f"importance_{stage_key}"
+    shown_key = f"shown_pair_{stage_key}"
+    
+    if st.session_state.get(shown_key) == pair_pos and choice_key in st.session_state:
+        # Aynı çift: kullanıcının seçimi korunur; gizlenen kaydırıcı yeniden başlar
+        if importance_key not in st.session_state:
+            st.session_state[importance_key] = DEFAULT_IMPORTANCE
+        return
     
-    if pair_idx >= len(pairs):
-        return True  # Tamamlandı
+    code = get_stage_codes(stage_key)[pair_pos]
+    if code == MISSING or code == 0:
+        st.session_state[choice_key] = CHOICE_EQUAL
+        st.session_state[importance_key] = DEFAULT_IMPORTANCE
+    else:
+        st.session_state[choice_key] = CHOICE_A if code > 0 else CHOICE_B
+        st.session_state[importance_key] = abs(code)
+    st.session_state[shown_key] = pair_pos
+
+def submit_answer(stage_key, pair_idx, pair_pos):
+    """'Devam' tıklaması: yanıtı kaydet ve sonraki soruya geç"""
+    choice = st.session_state[f"choice_{stage_key}"]
+    importance = st.session_state.get(f"importance_{stage_key}", DEFAULT_IMPORTANCE)
+    
+    # Yanıtı kaydet
+    if choice == CHOICE_EQUAL:
+        code = 0
+    elif choice == CHOICE_A:
+        code = importance
+    else:
+        code = -importance
+    
+    save_response(stage_key, pair_pos, code)
     
-    pair = pairs[pair_idx]
-    criterion_a = pair[0]
-    criterion_b = pair[1]
+    # Uyarlanabilir mod: sıradaki çift ya da durma kararı tıklamada seçilir;
+    # set_pair_idx ikisini de konumla birlikte günlüğe yazar
+    selector = get_adaptive_selector(stage_key)
+    if selector is not None and not selector.finished and pair_idx + 1 >= len(selector.order):
+        selector.select_next(get_answered_codes(stage_key))
     
-    pair_key = f"{criterion_a[0]}_{criterion_b[0]}"
+    # Sonraki soruya geç
+    set_pair_idx(stage_key, pair_idx + 1)
+    
+    # Otomatik kayıt: Tüm aşamalar tamamlandı mı kontrol et
+    check_and_auto_save()
+
+@timed("display_comparison")
+def display_comparison(stage_key, pair_idx):
+    """Kriter karşılaştırma arayüzü"""
+    # Çift tabloları süreç başına bir kez oluşturulur
+    pairs = stage_layout(stage_key).pairs
+    selector = get_adaptive_selector(stage_key)
+    
+    if selector is not None:
+        # Uyarlanabilir mod: sıradaki çifti şimdiye kadarki yanıtlardan seç
+        if pair_idx >= len(selector.order):
+            if selector.finished or selector.select_next(get_answered_codes(stage_key)) is None:
+                return True  # Ağırlık tahmini yeterince kesin, aşama tamamlandı
+        pair_pos = selector.order[pair_idx]
+    else:
+        if pair_idx >= len(pairs):
+            return True  # Tamamlandı
+        pair_pos = pair_idx
+    criterion_a, criterion_b = pairs[pair_pos]
+    sync_widgets(stage_key, pair_pos)
     
     # Progress bar
     progress = (pair_idx + 1) / len(pairs)
-    st.progress(progress, text=f"İlerleme: {pair_idx + 1}/{len(pairs)}")
+    if selector is not None:
+        st.progress(progress, text=f"Soru {pair_idx + 1} (en fazla {len(pairs)})")
+    else:
+        st.progress(progress, text=f"İlerleme: {pair_idx + 1}/{len(pairs)}")
+    
+    display_consistency_warning(stage_key)
     
     st.markdown("---")
     st.subheader("🔍 Kriter Karşılaştırması")
@@ -155,88 +302,54 @@ def display_comparison(stage_key, pair_idx):
     col_a, col_b, col_c = st.columns([1, 2, 1])
     
     with col_b:
-        # Önce hangisinin önemli olduğunu seç
+        # Önce hangisinin önemli olduğunu seç; değerler sync_widgets'tan gelir
+        choice_labels = [f"Kriter {criterion_a[0].upper()}: {criterion_a[1]}", 
+                         "Eşit önemde",
+                         f"Kriter {criterion_b[0].upper()}: {criterion_b[1]}"]
         choice = st.radio(
             "Daha önemli olan kriter:",
-            [f"Kriter {criterion_a[0].upper()}: {criterion_a[1]}", 
-             "Eşit önemde",
-             f"Kriter {criterion_b[0].upper()}: {criterion_b[1]}"],
-            key=f"choice_{stage_key}_{pair_key}",
-            index=1
+            [CHOICE_A, CHOICE_EQUAL, CHOICE_B],
+            format_func=choice_labels.__getitem__,
+            key=f"choice_{stage_key}"
         )
         
         # Önem derecesi
-        importance = 0
-        if choice != "Eşit önemde":
-            importance = st.select_slider(
+        if choice != CHOICE_EQUAL:
+            st.select_slider(
                 "Önem derecesi:",
                 options=[1, 2, 3],
-                value=2,
                 format_func=lambda x: {1: "Zayıf tercih", 2: "Orta düzey", 3: "Çok güçlü"}[x],
-                key=f"importance_{stage_key}_{pair_key}"
+                key=f"importance_{stage_key}"
             )
     
-    # Yanıtı kaydet ve devam et
+    # Yanıtı kaydet ve devam et; geri çağırmalar parça (fragment) yeniden
+    # çalışmadan önce işlenir, ek st.rerun() gerekmez
     col_prev, col_next = st.columns(2)
     
     with col_prev:
         if pair_idx > 0:
-            if st.button("⬅️ Önceki", key=f"prev_{stage_key}_{pair_idx}"):
-                st.session_state[f'pair_idx_{stage_key}'] = pair_idx - 1
-                st.rerun()
+            st.button("⬅️ Önceki", key=f"prev_{stage_key}",
+                      on_click=set_pair_idx, args=(stage_key, pair_idx - 1))
     
     with col_next:
-        if st.button("Devam ➡️" if pair_idx < len(pairs) - 1 else "Bu Aşamayı Tamamla ✓", key=f"next_{stage_key}_{pair_idx}"):
-            # Yanıtı kaydet
-            if choice == "Eşit önemde":
-                response = "0"
-            elif criterion_a[1] in choice:
-                response = f"{importance}{criterion_a[0]}"
-            else:
-                response = f"{importance}{criterion_b[0]}"
-            
-            save_response(stage_key, pair_key, response)
-            
-            # Sonraki soruya geç
-            st.session_state[f'pair_idx_{stage_key}'] = pair_idx + 1
-            
-            # Otomatik kayıt: Tüm aşamalar tamamlandı mı kontrol et
-            check_and_auto_save()
-            
-            st.rerun()
+        is_last = selector is None and pair_idx == len(pairs) - 1
+        st.button("Bu Aşamayı Tamamla ✓" if is_last else "Devam ➡️", key=f"next_{stage_key}",
+                  on_click=submit_answer, args=(stage_key, pair_idx, pair_pos))
     
     return False
 
 def welcome_page():
     """Karşılama sayfası"""
-    st.title("🌱 Net Zero Proje Değerlendirme Sistemi")
-    st.markdown("---")
-    
-    st.markdown("""
-    ### Hoş Geldiniz!
+    # Bağlantı koptuysa URL'deki oturum kodundan kaldığı yerden devam et
+    token = st.query_params.get("oturum")
+    if token and restore_session(token):
+        st.rerun()
     
-    Bu sistem, Net Zero Projesi kapsamındaki proje başvurularını değerlendirmek için tasarlanmıştır.
-    
-    #### 📋 Değerlendirme Aşamaları:
-    1. **2. Aşama** - Tema Önceliği (15 kriter)
-    2. **3. Aşama** - Olgunluk Değerlendirmesi (4 kriter)
-    3. **4. Aşama** - Etki ve Kalite (5 kriter)
-    4. **Aşamalar Arası** - Aşamaların önem karşılaştırması (3 kriter)
-    
-    #### 🎯 Nasıl Çalışır?
-    - Her adımda iki kriter karşılaştırılır
-    - Hangisinin daha önemli olduğunu seçersiniz
-    - Önem derecesini belirlersiniz (zayıf, orta, güçlü)
-    - Tüm değerlendirme otomatik olarak kaydedilir
-    
-    #### ⏱️ Tahmini Süre:
-    - **2. Aşama**: ~17 dakika (105 karşılaştırma)
-    - **3. Aşama**: ~2 dakika (6 karşılaştırma)
-    - **4. Aşama**: ~5 dakika (21 karşılaştırma)
-    - **Aşamalar Arası**: ~1 dakika (3 karşılaştırma)
+    survey = get_survey()
+    st.title(f"{survey.icon} {survey.title} Sistemi")
+    st.markdown("---")
     
-    **Toplam**: Yaklaşık 25 dakika
-    """)
+    st.markdown(welcome_text(survey.survey_id))
     
     st.markdown("---")
     
@@ -246,128 +359,186 @@ def welcome_page():
     with col2:
         expert_org = st.text_input("🏢 Kurum/Organizasyon:")
     
+    adaptive_mode = st.checkbox(
+        "⚡ Hızlı mod (uyarlanabilir soru seçimi)",
+        value=st.session_state.get('adaptive_mode', False),
+        help="Büyük aşamalarda yalnızca en bilgilendirici karşılaştırmalar sorulur; süre yarıdan fazla "
+             "kısalır, ağırlıklar tüm karşılaştırmalara göre ortalama ~%10-15 farklı çıkabilir."
+    )
+    
     if st.button("🚀 Değerlendirmeye Başla"):
         if expert_name:
             st.session_state.expert_name = expert_name
             st.session_state.expert_org = expert_org
-            st.session_state.current_stage = "stage2"
-            st.session_state['pair_idx_stage2'] = 0
+            st.session_state.adaptive_mode = adaptive_mode
+            st.session_state.current_stage = survey.stages[0]
+            
+            # Yeni oturum kodu; sayfa adresinde tutulur
+            st.session_state.session_token = new_session_token()
+            st.query_params["oturum"] = st.session_state.session_token
+            journal_write('record_meta', expert_name=expert_name, expert_org=expert_org,
+                          adaptive_mode=adaptive_mode, survey_id=survey.survey_id)
+            set_pair_idx(survey.stages[0], 0)
             st.rerun()
         else:
             st.error("Lütfen adınızı soyadınızı girin.")
 
+@st.cache_resource
+def welcome_text(survey_id):
+    """Karşılama metni; kriter, karşılaştırma sayıları ve süreler anketten hesaplanır"""
+    survey = load_survey(survey_id)
+    minutes = {s: max(1, round(n * SECONDS_PER_COMPARISON / 60)) for s, n in survey.n_pairs.items()}
+    stage_lines = "\n".join(
+        f"{k}. **{survey.criteria[s]['name']}** ({survey.n_criteria[s]} kriter)"
+        for k, s in enumerate(survey.stages, 1)
+    )
+    duration_lines = "\n".join(
+        f"- **{survey.short_names[s]}**: ~{minutes[s]} dakika ({survey.n_pairs[s]} karşılaştırma)"
+        for s in survey.stages
+    )
+    adaptive_note = adaptive_total = ""
+    if any(is_adaptive_stage(s, survey_id) for s in survey.stages):
+        adaptive_note = (
+            "- **Hızlı mod** seçilirse yalnızca en bilgilendirici karşılaştırmalar sorulur;\n"
+            "  ağırlık tahmini yeterince kesinleşince aşama kendiliğinden tamamlanır\n"
+        )
+        questions = sum(expected_questions(s, survey_id) for s in survey.stages)
+        adaptive_total = (f"\n\n**Hızlı modda**: Yaklaşık {max(1, round(questions * SECONDS_PER_COMPARISON / 60))} "
+                          f"dakika (~{questions} karşılaştırma)")
+    return f"""### Hoş Geldiniz!
+
+{survey.description}
+
+#### 📋 Değerlendirme Aşamaları:
+{stage_lines}
+
+#### 🎯 Nasıl Çalışır?
+- Her adımda iki kriter karşılaştırılır
+- Hangisinin daha önemli olduğunu seçersiniz
+- Önem derecesini belirlersiniz (zayıf, orta, güçlü)
+- Tüm değerlendirme otomatik olarak kaydedilir
+{adaptive_note}
+#### ⏱️ Tahmini Süre:
+{duration_lines}
+
+**Toplam**: Yaklaşık {sum(minutes.values())} dakika ({survey.total_pairs} karşılaştırma){adaptive_total}
+"""
+
+@st.cache_resource
+def stage_tabs(survey_id):
+    """Gezinme sekmeleri ve aşama gövdelerinin önkoşulu/mesajları; anket başına bir kez.
+    
+    Yalnızca seçili sekmenin gövdesi çalıştırılır; her aşama bir öncekinde
+    en az bir yanıt gerektirir.
+    """
+    survey = load_survey(survey_id)
+    tabs = [(s, survey.tab_labels[s]) for s in survey.stages] + [("results", "📊 Sonuçlar")]
+    panels = {}
+    for k, stage in enumerate(survey.stages):
+        previous = survey.stages[k - 1] if k else None
+        following = survey.stages[k + 1] if k + 1 < len(survey.stages) else None
+        panels[stage] = {
+            "requires": previous and (previous, f"⚠️ Önce **{survey.short_names[previous]}** bölümünü tamamlayın."),
+            "done": f"✅ {survey.short_names[stage]} tamamlandı!" if following else "🎉 Tüm değerlendirme tamamlandı!",
+            "next": following and f"👉 Üstteki **'{survey.tab_labels[following]}'** sekmesine tıklayarak devam edin.",
+        }
+    return tabs, panels
+
+def finish_evaluation():
+    """Son aşama bitince otomatik kaydet (henüz kaydedilmemişse)"""
+    if not st.session_state.get('auto_saved', False):
+        success = save_results_to_server()
+        if success:
+            mark_auto_saved()
+            st.success("✅ Değerlendirmeniz otomatik olarak kaydedildi!")
+            st.balloons()
+        else:
+            st.error("⚠️ Otomatik kayıt başarısız. Lütfen 'Sonuçlar' sekmesinden manuel olarak kaydedin.")
+    else:
+        st.info("✅ Değerlendirmeniz daha önce kaydedildi.")
+    display_save_status()
+
+@st.fragment
+@timed("fragment_rerun")
+def stage_panel(stage_key):
+    """Etkin karşılaştırma bloğu; tıklamalar yalnızca bu bloğu yeniden çalıştırır"""
+    # Parça yeniden çalışmaları main()'e uğramaz; ölçüm dosyası burada da yenilenir
+    get_recorder().maybe_export()
+    panel = stage_tabs(st.session_state.survey_id)[1][stage_key]
+    if is_evicted():
+        # Kaydedilmiş oturumun karşılaştırma durumu tutulmaz; aşama tamamlandı
+        completed = True
+    else:
+        if f'pair_idx_{stage_key}' not in st.session_state:
+            st.session_state[f'pair_idx_{stage_key}'] = 0
+        completed = display_comparison(stage_key, st.session_state[f'pair_idx_{stage_key}'])
+    
+    if completed:
+        st.success(panel["done"])
+        if panel["next"]:
+            st.info(panel["next"])
+        else:
+            finish_evaluation()
+
 def main_evaluation():
     """Ana değerlendirme sayfası"""
-    st.title("🌱 Net Zero Proje Değerlendirme")
+    evict_if_saved()
+    survey = get_survey()
+    tabs, panels = stage_tabs(survey.survey_id)
+    st.title(f"{survey.icon} {survey.title}")
     
     st.markdown(f"**Uzman:** {st.session_state.expert_name}")
+    if st.session_state.get('session_token'):
+        st.caption("🔖 Bağlantınız koparsa bu sayfanın adresini yeniden açarak kaldığınız yerden devam edebilirsiniz.")
     
     st.markdown("---")
     
     # Aşama seçimi
-    tabs = st.tabs([
-        "2️⃣ Tema Önceliği",
-        "3️⃣ Olgunluk",
-        "4️⃣ Etki ve Kalite",
-        "🔗 Aşamalar Arası",
-        "📊 Sonuçlar"
-    ])
-    
-    # 2. Aşama
-    with tabs[0]:
-        st.header(CRITERIA["stage2"]["name"])
-        if f'pair_idx_stage2' not in st.session_state:
-            st.session_state['pair_idx_stage2'] = 0
-        
-        completed = display_comparison("stage2", st.session_state['pair_idx_stage2'])
-        if completed:
-            st.success("✅ 2. Aşama tamamlandı!")
-            st.info("👉 Üstteki **'3️⃣ Olgunluk'** sekmesine tıklayarak devam edin.")
-    
-    # 3. Aşama
-    with tabs[1]:
-        st.header(CRITERIA["stage3"]["name"])
-        if 'stage2' in st.session_state.responses and len(st.session_state.responses['stage2']) > 0:
-            if f'pair_idx_stage3' not in st.session_state:
-                st.session_state['pair_idx_stage3'] = 0
-            
-            completed = display_comparison("stage3", st.session_state['pair_idx_stage3'])
-            if completed:
-                st.success("✅ 3. Aşama tamamlandı!")
-                st.info("👉 Üstteki **'4️⃣ Etki ve Kalite'** sekmesine tıklayarak devam edin.")
-        else:
-            st.warning("⚠️ Önce 2. Aşamayı tamamlayın.")
-    
-    # 4. Aşama
-    with tabs[2]:
-        st.header(CRITERIA["stage4"]["name"])
-        if 'stage3' in st.session_state.responses and len(st.session_state.responses['stage3']) > 0:
-            if f'pair_idx_stage4' not in st.session_state:
-                st.session_state['pair_idx_stage4'] = 0
-            
-            completed = display_comparison("stage4", st.session_state['pair_idx_stage4'])
-            if completed:
-                st.success("✅ 4. Aşama tamamlandı!")
-                st.info("👉 Üstteki **'🔗 Aşamalar Arası'** sekmesine tıklayarak devam edin.")
-        else:
-            st.warning("⚠️ Önce 3. Aşamayı tamamlayın.")
-    
-    # Aşamalar Arası
-    with tabs[3]:
-        st.header(CRITERIA["stage_comparison"]["name"])
-        if 'stage4' in st.session_state.responses and len(st.session_state.responses['stage4']) > 0:
-            if f'pair_idx_stage_comparison' not in st.session_state:
-                st.session_state['pair_idx_stage_comparison'] = 0
-            
-            completed = display_comparison("stage_comparison", st.session_state['pair_idx_stage_comparison'])
-            if completed:
-                st.success("🎉 Tüm değerlendirme tamamlandı!")
-                
-                # Otomatik kaydet (henüz kaydedilmemişse)
-                if not st.session_state.get('auto_saved', False):
-                    with st.spinner('Değerlendirmeniz kaydediliyor...'):
-                        success = save_results_to_server()
-                        if success:
-                            st.session_state.auto_saved = True
-                            st.success("✅ Değerlendirmeniz otomatik olarak kaydedildi!")
-                            st.balloons()
-                        else:
-                            st.error("⚠️ Otomatik kayıt başarısız. Lütfen 'Sonuçlar' sekmesinden manuel olarak kaydedin.")
-                else:
-                    st.info("✅ Değerlendirmeniz daha önce kaydedildi.")
-        else:
-            st.warning("⚠️ Önce 4. Aşamayı tamamlayın.")
+    labels = [label for _, label in tabs]
+    active_label = st.radio("Bölüm:", labels, horizontal=True, key="active_tab",
+                            label_visibility="collapsed")
+    active = tabs[labels.index(active_label)][0]
     
     # Sonuçlar
-    with tabs[4]:
+    if active == "results":
         st.header("📊 Değerlendirme Sonuçları")
         display_results()
+        return
+    
+    st.header(survey.criteria[active]["name"])
+    requires = panels[active]["requires"]
+    if requires and not answered_count(requires[0]):
+        st.warning(requires[1])
+        return
+    
+    stage_panel(active)
 
 def display_results():
     """Sonuçları göster"""
-    if not st.session_state.responses:
+    survey = get_survey()
+    counts = {stage_key: answered_count(stage_key) for stage_key in survey.stages}
+    if not any(counts.values()):
         st.info("Henüz değerlendirme yapılmadı.")
         return
     
     # Özet bilgiler
-    for stage_key, responses in st.session_state.responses.items():
-        stage_name = CRITERIA[stage_key]["name"]
-        st.write(f"**{stage_name}:** {len(responses)} karşılaştırma tamamlandı ✅")
+    for stage_key, count in counts.items():
+        if count:
+            stage_name = survey.criteria[stage_key]["name"]
+            st.write(f"**{stage_name}:** {count} karşılaştırma tamamlandı ✅")
+            if not stage_completed(stage_key):
+                display_partial_estimate(stage_key)
     
     st.markdown("---")
     
     # Tüm aşamalar tamamlandı mı kontrol et
-    all_completed = (
-        'stage2' in st.session_state.responses and 
-        'stage3' in st.session_state.responses and 
-        'stage4' in st.session_state.responses and 
-        'stage_comparison' in st.session_state.responses
-    )
+    all_completed = all(stage_completed(stage_key) for stage_key in survey.stages)
     
     if all_completed:
         # Otomatik kayıt yapıldı mı bildir
         if st.session_state.get('auto_saved', False):
             st.success("✅ Değerlendirmeniz otomatik olarak kaydedildi!")
+        display_save_status()
         
         st.success("🎉 Tüm aşamalar tamamlandı!")
         
@@ -383,44 +554,86 @@ def display_results():
     else:
         st.warning("⚠️ Lütfen tüm aşamaları tamamlayın.")
 
+def display_partial_estimate(stage_key, top=3):
+    """Yarım kalan aşamada şimdiye kadarki yanıtlardan LLS ağırlık tahmini"""
+    estimate = estimate_codes(stage_key, get_stage_codes(stage_key), st.session_state.survey_id)
+    if not estimate.connected[0]:
+        st.caption(f"Yanıtlar henüz tüm kriterleri birbirine bağlamıyor "
+                   f"({estimate.n_components[0]} ayrı grup); ağırlık tahmini için devam edin.")
+        return
+    
+    # Log ağırlık standart hatası ağırlığın göreli hatasına yaklaşık eşittir
+    letters = stage_layout(stage_key).letters
+    weights = estimate.weights[0].tolist()
+    log_std = estimate.log_std[0].tolist()
+    ranked = sorted(range(len(weights)), key=lambda k: -weights[k])[:top]
+    leaders = ", ".join(
+        f"{letters[k].upper()} (%{weights[k] * 100:.0f} ± {weights[k] * log_std[k] * 100:.0f})"
+        for k in ranked
+    )
+    st.caption(f"Şimdiye kadarki yanıtlara göre öne çıkan kriterler: {leaders}")
+
+def build_record():
+    """Kaydedilecek verinin anlık görüntüsü (kuyrukta beklerken değişmez)"""
+    # Aynı oturumun yeniden kayıtları yerel depoda tek kayıt olarak güncellenir
+    if not st.session_state.get('session_token'):
+        st.session_state.session_token = new_session_token()
+    return {
+        "submission_id": st.session_state.session_token,
+        "timestamp": datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+        "expert_name": st.session_state.expert_name,
+        "expert_org": st.session_state.get('expert_org', ''),
+        "survey_id": st.session_state.survey_id,
+        # Sıkıştırılmış kayıt metni; Sheets ve yerel depo doğrudan kullanır
+        "responses": st.session_state.get('saved_payload') or encode_payload(),
+    }
+
+def encode_payload():
+    """Oturumun tüm aşama kodlarını sıkıştırılmış kayıt metnine çevir"""
+    return encode_codes({stage: get_stage_codes(stage) for stage in get_survey().stages},
+                        st.session_state.survey_id)
+
+# Kalıcı kayıttan sonra oturumdan silinen anahtarların önekleri. Uyarlanabilir
+# seçiciler aşama adıyla tam eşleşen anahtarlarla silinir; 'adaptive_' öneki
+# oturum tercihi adaptive_mode'u da silerdi.
+EVICTED_PREFIXES = ('consistency_', 'pair_idx_', 'shown_pair_', 'choice_', 'importance_')
+
+def evict_if_saved():
+    """Değerlendirme kalıcı olarak kaydedildiyse oturumu sıkıştırılmış kayda indir.
+    
+    Yanıt dizileri, tutarlılık takipçileri, uyarlanabilir seçiciler ve
+    konumlar silinir; sonuç ekranı ve yeniden kayıt saved_payload'dan çalışır.
+    """
+    if is_evicted() or not st.session_state.get('auto_saved', False):
+        return
+    ticket = st.session_state.get('save_ticket')
+    if ticket is not None and ticket.status not in (SaveTicket.SAVED, SaveTicket.LOCAL):
+        return
+    
+    payload = encode_payload()
+    selector_keys = {f'adaptive_{stage}' for stage in get_survey().stages}
+    for key in [k for k in st.session_state
+                if k.startswith(EVICTED_PREFIXES) or k in selector_keys]:
+        del st.session_state[key]
+    st.session_state.codes = {}
+    st.session_state.saved_payload = payload
+
 def save_results_to_server():
-    """Sonuçları Google Sheets'e kaydet (sadece JSON olarak)"""
+    """Sonuçları Google Sheets kayıt kuyruğuna gönder (beklemeden döner)"""
     try:
         # Google Sheets credentials
         credentials_dict = st.secrets.get("gcp_service_account", None)
         
-        if not credentials_dict or not GOOGLE_SHEETS_AVAILABLE:
-            # Fallback: Local kayıt
-            return save_to_local_temp()
-        
-        # Google Sheets bağlantısı
-        scope = ['https://spreadsheets.google.com/feeds',
-                 'https://www.googleapis.com/auth/drive']
-        
-        credentials = ServiceAccountCredentials.from_json_keyfile_dict(
-            credentials_dict, scope)
-        client = gspread.authorize(credentials)
+        # Spreadsheet ID anket tanımında ya da Streamlit secrets'ta
+        spreadsheet_id = get_survey().spreadsheet_id or st.secrets.get("spreadsheet_id", None)
         
-        # Spreadsheet aç (ID Streamlit secrets'ta)
-        spreadsheet_id = st.secrets.get("spreadsheet_id", None)
-        if not spreadsheet_id:
+        if not credentials_dict or not spreadsheet_id or not GOOGLE_SHEETS_AVAILABLE:
+            # Fallback: Local kayıt
             return save_to_local_temp()
         
-        sheet = client.open_by_key(spreadsheet_id).sheet1
-        
-        # Veri hazırla - SADECE 4 SÜTUN
-        timestamp = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-        expert_name = st.session_state.expert_name
-        expert_org = st.session_state.get('expert_org', '')
-        
-        # Tüm veriyi JSON olarak
-        json_data = json.dumps(st.session_state.responses, ensure_ascii=False)
-        
-        # Tek satır, 4 sütun
-        row_data = [timestamp, expert_name, expert_org, json_data]
-        
-        # Satırı ekle
-        sheet.append_row(row_data)
+        # Bağlantı ve yazma arka plandaki yazıcıda yapılır; sonuç bilete yansır
+        writer = get_writer(spreadsheet_id, dict(credentials_dict), st.session_state.survey_id)
+        st.session_state.save_ticket = writer.submit(build_record())
         
         return True
         
@@ -431,37 +644,53 @@ def save_results_to_server():
 
 def save_to_local_temp():
     """Yedek: Local temp klasörüne kaydet"""
-    try:
-        data = {
-            "expert_name": st.session_state.expert_name,
-            "expert_org": st.session_state.get('expert_org', ''),
-            "timestamp": datetime.now().isoformat(),
-            "responses": st.session_state.responses
-        }
-        
-        json_str = json.dumps(data, ensure_ascii=False, indent=2)
-        
-        safe_name = st.session_state.expert_name.replace(' ', '_').replace('/', '_')
-        timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-        filename = f"degerlendirme_{safe_name}_{timestamp}.json"
-        
-        save_path = f"/tmp/{filename}"
-        
-        with open(save_path, 'w', encoding='utf-8') as f:
-            f.write(json_str)
-        
-        return True
-        
-    except Exception as e:
-        print(f"Local kayıt hatası: {e}")
-        return False
+    st.session_state.pop('save_ticket', None)
+    return save_record_locally(build_record())
+
+def display_save_status():
+    """Arka plandaki kaydın durumunu göster; beklerken kendini yeniler"""
+    evict_if_saved()
+    ticket = st.session_state.get('save_ticket')
+    if ticket is None:
+        return
+    
+    @st.fragment(run_every=2 if ticket.status == SaveTicket.PENDING else None)
+    def save_status():
+        if ticket.status == SaveTicket.PENDING:
+            st.info("⏳ Değerlendirmeniz arka planda kaydediliyor...")
+        elif ticket.status == SaveTicket.SAVED:
+            evict_if_saved()
+            st.success("☁️ Değerlendirmeniz sunucuya kaydedildi.")
+        elif ticket.status == SaveTicket.LOCAL:
+            evict_if_saved()
+            st.info("💾 Sunucuya ulaşılamadı; değerlendirmeniz yerel yedeğe kaydedildi.")
+        else:
+            st.error("❌ Kayıt sırasında bir hata oluştu. Lütfen 'Sonuçları Tekrar Kaydet' ile tekrar deneyin.")
+    
+    save_status()
 
 # Ana uygulama
 def main():
+    # Sayfa yapılandırması her yolda bir kez, başlık ve simge belli olduktan sonra
+    if "yonetim" in st.query_params:
+        st.set_page_config(page_title="Yönetim", page_icon="🛠️", layout="wide")
+        admin_page()
+        return
+    try:
+        survey = get_survey()
+    except ValueError as e:
+        st.set_page_config(layout="wide")
+        st.error(f"{e}. Mevcut anketler: {', '.join(available_surveys())}")
+        return
+    st.set_page_config(page_title=survey.title, page_icon=survey.icon, layout="wide")
     if st.session_state.current_stage == "welcome":
         welcome_page()
     else:
         main_evaluation()
 
 if __name__ == "__main__":
-    main()
+    try:
+        with timed("rerun"):
+            main()
+    finally:
+        get_recorder().maybe_export()
@@ -0,0 +1,86 @@
+"""Uyarlanabilir mod doğruluk simülasyonu.
+
+Her sanal uzman için gerçek ağırlıklar çekilir; yanıtlar log oranlara
+gürültü eklenip arayüzün ölçeğine (eşit, 3, 5, 7) yuvarlanarak üretilir.
+Aynı yanıtlarla hem tüm çiftler (özvektör) hem uyarlanabilir mod (LLS)
+değerlendirilir ve şunlar raporlanır: sorulan soru sayısı, tam matrise
+göre göreli ağırlık farkı, en önemli kriterin aynı çıkma oranı ve her iki
+yöntemin gerçek ağırlıklara göre hatası.
+
+Uyarlanabilir mod soru sayısını yarıdan fazla azaltmak için doğruluktan
+ödün verir (bkz. adaptive.MAX_REMAINING_STD). Tam matristen medyan fark
+--max-deviation'ı ya da uyarlanabilir modun gerçek ağırlıklara medyan
+hatası tam matrisin hatasını --tolerance oranından fazla aşarsa betik 1
+ile çıkar; varsayılan sınırlar bu ödünün belgelenen düzeyidir.
+
+Kullanım:
+    python benchmarks/adaptive_accuracy.py --experts 200 --noise 0.2 0.4 0.6
+"""
+import argparse
+import os
+import sys
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from adaptive import simulate_codes, simulate_session  # noqa: E402
+from ahp import MISSING, evaluate_codes, get_layout  # noqa: E402
+from partial import estimate_codes  # noqa: E402
+
+
+def run(stage_key, n_experts, noise, concentration, seed):
+    layout = get_layout(stage_key)
+    rng = np.random.default_rng(seed)
+    true_weights = rng.dirichlet(np.full(layout.n, concentration), size=n_experts)
+    codes = np.stack([simulate_codes(layout, w, noise, rng) for w in true_weights])
+    partial_codes = np.stack([simulate_session(stage_key, c) for c in codes])
+
+    full = evaluate_codes(stage_key, codes).weights
+    adaptive = estimate_codes(stage_key, partial_codes).weights
+    asked = (partial_codes != MISSING).sum(axis=1)
+    return {
+        "asked": asked.mean(),
+        "asked_min": asked.min(),
+        "asked_max": asked.max(),
+        "vs_full": np.median(np.abs(adaptive - full) / full),
+        "top_match": (adaptive.argmax(axis=1) == full.argmax(axis=1)).mean(),
+        "adaptive_error": np.median(np.abs(adaptive - true_weights) / true_weights),
+        "full_error": np.median(np.abs(full - true_weights) / true_weights),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("--stage", default="stage2")
+    parser.add_argument("--experts", type=int, default=200)
+    parser.add_argument("--noise", type=float, nargs="+", default=[0.2, 0.4, 0.6],
+                        help="Yargı gürültüsü (log ölçekte std)")
+    parser.add_argument("--concentration", type=float, default=2.0,
+                        help="Gerçek ağırlıkların Dirichlet parametresi")
+    parser.add_argument("--max-deviation", type=float, default=0.15,
+                        help="Tam matrise göre izin verilen medyan göreli fark")
+    parser.add_argument("--tolerance", type=float, default=1.0,
+                        help="Gerçeğe göre hatada tam matrise izin verilen göreli fazlalık")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    n_pairs = get_layout(args.stage).n_pairs
+    print(f"{'gürültü':>8} {'soru':>6} {'aralık':>9} {'tama fark':>10} {'ilk aynı':>9} "
+          f"{'hata (uyarl.)':>14} {'hata (tam)':>11}")
+    failed = False
+    for noise in args.noise:
+        r = run(args.stage, args.experts, noise, args.concentration, args.seed)
+        print(f"{noise:>8.2f} {r['asked']:>6.1f} {r['asked_min']:>4}-{r['asked_max']:<4} "
+              f"{r['vs_full']:>10.1%} {r['top_match']:>9.0%} {r['adaptive_error']:>14.1%} "
+              f"{r['full_error']:>11.1%}")
+        if (r["vs_full"] > args.max_deviation
+                or r["adaptive_error"] > r["full_error"] * (1 + args.tolerance)):
+            failed = True
+    print(f"(aşamada {n_pairs} çift)")
+    if failed:
+        print("Uyarlanabilir mod doğruluğu tam matrisin gerisinde kaldı")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,119 @@
+"""Yük testi için gspread / oauth2client yerine geçen yerel sahte modüller.
+
+install() çağrıldıktan sonra uygulamanın `import gspread` ve
+`from oauth2client.service_account import ServiceAccountCredentials`
+satırları bu modüldeki sınıfları alır. Her API çağrısı ayarlanabilir bir
+gecikme bekler ve verilen olasılıkla 429 (kota) hatası döndürür. Gerçek
+tablodaki gibi ızgara en az GRID_ROWS satırdır ve eklemelerle yalnızca son
+veri satırına kadar büyür; ızgaranın dışında başlayan okumalar 400 döndürür.
+"""
+import random
+import sys
+import threading
+import time
+import types
+
+# Tüm sahte tablolar için ortak ayarlar; install() ile değiştirilir
+SETTINGS = {"latency": 0.2, "quota_error_rate": 0.0}
+
+# Yeni bir tablonun satır sayısı (Google Sheets varsayılanı)
+GRID_ROWS = 1000
+
+
+class FakeResponse:
+    def __init__(self, status_code):
+        self.status_code = status_code
+
+
+class APIError(Exception):
+    """gspread.exceptions.APIError gibi: hata kodu response.status_code'da"""
+
+    def __init__(self, status_code, message=""):
+        super().__init__(f"HTTP {status_code}" + (f": {message}" if message else ""))
+        self.response = FakeResponse(status_code)
+
+
+class FakeWorksheet:
+    """Satırları bellekte tutan, gecikmeli ve kota hatalı çalışma sayfası"""
+
+    def __init__(self):
+        self.rows = []
+        self.calls = 0
+        self.quota_errors = 0
+        self._lock = threading.Lock()
+
+    def _call(self):
+        time.sleep(SETTINGS["latency"])
+        with self._lock:
+            self.calls += 1
+            if random.random() < SETTINGS["quota_error_rate"]:
+                self.quota_errors += 1
+                raise APIError(429)
+
+    def append_row(self, row, **kwargs):
+        self.append_rows([row], **kwargs)
+
+    def append_rows(self, rows, **kwargs):
+        self._call()
+        with self._lock:
+            self.rows.extend(list(row) for row in rows)
+
+    @property
+    def row_count(self):
+        return max(GRID_ROWS, len(self.rows))
+
+    def get(self, range_name):
+        self._call()
+        start = int(range_name.split(":")[0].lstrip("ABCDE")) - 1
+        with self._lock:
+            if start >= self.row_count:
+                raise APIError(400, f"Range ({range_name}) exceeds grid limits. "
+                                    f"Max rows: {self.row_count}, max columns: 26")
+            return [list(row) for row in self.rows[start:]]
+
+
+class FakeSpreadsheet:
+    def __init__(self, worksheet):
+        self.sheet1 = worksheet
+
+
+class FakeClient:
+    def open_by_key(self, key):
+        time.sleep(SETTINGS["latency"])
+        return FakeSpreadsheet(WORKSHEETS.setdefault(key, FakeWorksheet()))
+
+
+class ServiceAccountCredentials:
+    @classmethod
+    def from_json_keyfile_dict(cls, keyfile_dict, scope):
+        return cls()
+
+
+def authorize(credentials):
+    time.sleep(SETTINGS["latency"])
+    return FakeClient()
+
+
+# Tablo kimliği -> sahte çalışma sayfası
+WORKSHEETS = {}
+
+
+def install(latency=0.2, quota_error_rate=0.0):
+    """Sahte modülleri sys.modules'e yerleştir (uygulama içe aktarılmadan önce)"""
+    SETTINGS["latency"] = latency
+    SETTINGS["quota_error_rate"] = quota_error_rate
+
+    gspread = types.ModuleType("gspread")
+    gspread.authorize = authorize
+    gspread.exceptions = types.ModuleType("gspread.exceptions")
+    gspread.exceptions.APIError = APIError
+
+    oauth2client = types.ModuleType("oauth2client")
+    service_account = types.ModuleType("oauth2client.service_account")
+    service_account.ServiceAccountCredentials = ServiceAccountCredentials
+    oauth2client.service_account = service_account
+
+    sys.modules["gspread"] = gspread
+    sys.modules["gspread.exceptions"] = gspread.exceptions
+    sys.modules["oauth2client"] = oauth2client
+    sys.modules["oauth2client.service_account"] = service_account
@@ -0,0 +1,177 @@
+"""Eşzamanlı uzman yük testi.
+
+Streamlit'in başsız uygulama testi (AppTest) ile app.py'yi baştan sona,
+135 karşılaştırmanın tamamını yanıtlayan senaryolarla çalıştırır. gspread
+yerine gecikmesi ve 429 oranı ayarlanabilen yerel sahte tablo kullanılır.
+Her eşzamanlılık düzeyi için tıklama gecikmesi yüzdelikleri, kayıt hızı
+ve oturum başına bellek raporlanır.
+
+Kullanım:
+    python benchmarks/load_test.py --concurrency 1 4 16 --latency 0.2 --quota-error-rate 0.1
+
+Yerel depo, günlük ve metrik dosyası geçici bir dizine yönlendirilir;
+test kayıtları üretimdeki yerel depoya düşüp sonra gerçek tabloya
+aktarılamaz.
+
+Not: AppTest parça (fragment) yeniden çalıştırmalarını desteklemez; her
+tıklama tüm betiği çalıştırır. Çalıştırmalar tek kilitle sıralandığından
+gecikmeler kuyrukta bekleme süresini de içerir; ikisi birlikte üst sınırdır.
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+
+# Uygulama modülleri içe aktarılmadan önce: yollar modül tanımında bağlanır
+WORK_DIR = tempfile.mkdtemp(prefix="degerlendirme_yuk_")
+os.environ["DEGERLENDIRME_STORE_PATH"] = os.path.join(WORK_DIR, "store.sqlite3")
+os.environ["DEGERLENDIRME_JOURNAL_PATH"] = os.path.join(WORK_DIR, "journal.sqlite3")
+os.environ["DEGERLENDIRME_METRICS_PATH"] = os.path.join(WORK_DIR, "metrics.prom")
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+import fake_gspread  # noqa: E402
+
+APP_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "app.py")
+SPREADSHEET_ID = "yuk-testi"
+
+# AppTest her çalıştırmada süreç genelindeki Runtime'ı kurup kaldırır, bu yüzden
+# betik çalıştırmaları sıraya girer. Bu, GIL altında tek süreçte çalışan
+# Streamlit sunucusuna yakındır; Sheets yazıcısı ise kilit dışında paralel çalışır.
+RUN_LOCK = threading.Lock()
+
+
+def percentile(values, q):
+    ordered = sorted(values)
+    if not ordered:
+        return float("nan")
+    return ordered[min(len(ordered) - 1, int(round(q / 100 * (len(ordered) - 1))))]
+
+
+def run_session(index, result):
+    """Bir uzmanın tüm değerlendirmesini tıklama tıklama oynat"""
+    from streamlit.testing.v1 import AppTest
+
+    rng = random.Random(index)
+    at = AppTest.from_file(APP_PATH, default_timeout=120)
+    at.secrets["gcp_service_account"] = {"type": "service_account"}
+    at.secrets["spreadsheet_id"] = SPREADSHEET_ID
+
+    def timed_run():
+        start = time.perf_counter()
+        with RUN_LOCK:
+            at.run()
+        result["latencies"].append(time.perf_counter() - start)
+
+    with RUN_LOCK:
+        at.run()
+    at.text_input[0].input(f"Uzman {index}")
+    at.text_input[1].input("Yük Testi")
+    at.button[0].click()
+    timed_run()
+
+    tab = 0
+    while True:
+        buttons = [b for b in at.button if b.key and b.key.startswith("next_")]
+        if not buttons:
+            navigation = at.radio(key="active_tab")
+            tab += 1
+            if tab >= len(navigation.options) - 1:
+                break
+            navigation.set_value(navigation.options[tab])
+            timed_run()
+            continue
+
+        stage = buttons[0].key[len("next_"):]
+        choices = [r for r in at.radio if r.key == f"choice_{stage}"]
+        if choices:
+            # Seçenekler: 0 birinci kriter, 1 eşit, 2 ikinci kriter
+            choices[0].set_value(rng.randrange(3))
+            timed_run()
+        at.button(key=f"next_{stage}").click()
+        timed_run()
+        if at.exception:
+            raise RuntimeError(at.exception[0].value)
+
+    result["tickets"].append(at.session_state["save_ticket"] if "save_ticket" in at.session_state else None)
+    result["apps"].append(at)
+
+
+def run_level(concurrency, trace_memory):
+    """Verilen sayıda uzmanı aynı anda çalıştır ve ölçümleri döndür"""
+    result = {"latencies": [], "tickets": [], "apps": [], "errors": []}
+
+    def worker(index):
+        try:
+            run_session(index, result)
+        except Exception as e:
+            result["errors"].append(repr(e))
+
+    if trace_memory:
+        tracemalloc.start()
+    memory_before = tracemalloc.get_traced_memory()[0] if trace_memory else 0
+    worksheet = fake_gspread.WORKSHEETS.get(SPREADSHEET_ID)
+    rows_before = len(worksheet.rows) if worksheet else 0
+    quota_before = worksheet.quota_errors if worksheet else 0
+
+    start = time.perf_counter()
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(concurrency)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    for ticket in result["tickets"]:
+        if ticket is not None:
+            ticket.done.wait(300)
+    elapsed = time.perf_counter() - start
+
+    memory_per_session = float("nan")
+    if trace_memory:
+        memory_per_session = (tracemalloc.get_traced_memory()[0] - memory_before) / concurrency
+        tracemalloc.stop()
+
+    worksheet = fake_gspread.WORKSHEETS.get(SPREADSHEET_ID)
+    statuses = [t.status if t is not None else "yok" for t in result["tickets"]]
+    return {
+        "concurrency": concurrency,
+        "clicks": len(result["latencies"]),
+        "p50": percentile(result["latencies"], 50) * 1000,
+        "p95": percentile(result["latencies"], 95) * 1000,
+        "p99": percentile(result["latencies"], 99) * 1000,
+        "saved": statuses.count("saved"),
+        "fallback": len(statuses) - statuses.count("saved"),
+        "throughput": ((len(worksheet.rows) if worksheet else 0) - rows_before) / elapsed,
+        "quota_errors": (worksheet.quota_errors if worksheet else 0) - quota_before,
+        "memory_kb": memory_per_session / 1024,
+        "errors": result["errors"],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 4, 16])
+    parser.add_argument("--latency", type=float, default=0.2, help="Sahte Sheets çağrı gecikmesi (sn)")
+    parser.add_argument("--quota-error-rate", type=float, default=0.0, help="429 döndürme olasılığı")
+    parser.add_argument("--trace-memory", action="store_true",
+                        help="Oturum başına belleği tracemalloc ile ölç (gecikmeleri artırır)")
+    args = parser.parse_args()
+
+    fake_gspread.install(latency=args.latency, quota_error_rate=args.quota_error_rate)
+
+    print(f"{'eşzamanlı':>9} {'tıklama':>8} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} "
+          f"{'kayıt':>6} {'yedek':>6} {'satır/sn':>9} {'429':>5} {'KB/oturum':>10}")
+    for concurrency in args.concurrency:
+        r = run_level(concurrency, args.trace_memory)
+        print(f"{r['concurrency']:>9} {r['clicks']:>8} {r['p50']:>8.1f} {r['p95']:>8.1f} {r['p99']:>8.1f} "
+              f"{r['saved']:>6} {r['fallback']:>6} {r['throughput']:>9.2f} {r['quota_errors']:>5} "
+              f"{r['memory_kb']:>10.1f}")
+        for error in r["errors"]:
+            print(f"  hata: {error}")
+    print(f"(test deposu, günlüğü ve metrikleri: {WORK_DIR})")
+
+
+if __name__ == "__main__":
+    main()
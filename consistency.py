@@ -0,0 +1,105 @@
+"""Uzman yanıt verirken artımlı tutarlılık takibi"""
+import math
+from array import array
+
+from ahp import CR_THRESHOLD, MISSING, SAATY_SCALE, get_layout
+from criteria import DEFAULT_SURVEY
+
+# Geometrik tutarlılık indeksi (GCI) eşikleri; CR = 0.1'e karşılık gelir
+# (Aguarón & Moreno-Jiménez, 2003)
+GCI_THRESHOLDS = {3: 0.31, 4: 0.35}
+GCI_THRESHOLD_DEFAULT = 0.37
+
+# Uyarı göstermeden önce gereken kapalı üçlü sayısı
+MIN_TRIADS = 3
+
+# Log ölçekli yanıt değerleri; kod -> log(a_ij)
+LOG_SCALE = [math.log(v) for v in SAATY_SCALE]
+
+
+def code_to_log(code):
+    """İşaretli kodu log(a_ij) değerine çevir"""
+    return math.copysign(LOG_SCALE[abs(code)], code) if code else 0.0
+
+
+class ConsistencyTracker:
+    """Kısmi matris üzerinde üçlü (i, j, k) hatalarını artımlı olarak tutar.
+
+    Tam bir matris için log-en küçük kareler artık kareleri toplamı,
+    tüm üçlülerin t = L_ij + L_jk - L_ik hata kareleri toplamının 1/n'idir.
+    Böylece GCI = ortalama(t²) / 3 olur ve yalnızca kapalı üçlüler
+    üzerinden tahmin edilebilir. Her yanıt en fazla n - 2 üçlüyü etkiler;
+    özdeğer ayrışımı gerekmez.
+
+    Log değerleri (n x n) ve üçlü hataları sabit boyutlu double dizilerinde
+    tutulur (NaN: bilinmiyor); oturum başına birkaç KB yer kaplar.
+    """
+
+    def __init__(self, stage_key, survey_id=DEFAULT_SURVEY):
+        layout = get_layout(stage_key, survey_id)
+        self.stage_key = stage_key
+        self.survey_id = survey_id
+        self.n = layout.n
+        self.letters = layout.letters
+        self.log_values = array("d", [math.nan]) * (self.n * self.n)
+        self.triad_errors = array("d", [math.nan]) * len(layout.triads)
+        self.closed_triads = 0
+        self.sum_squares = 0.0
+
+    def update(self, i, j, code):
+        """(i, j) çiftinin yanıtını güncelle ve etkilenen üçlüleri yeniden hesapla"""
+        n = self.n
+        log_value = code_to_log(code)
+        if self.log_values[i * n + j] == log_value:
+            return
+        self.log_values[i * n + j] = log_value
+
+        values = self.log_values
+        triad_index = get_layout(self.stage_key, self.survey_id).triad_index
+        for k in range(n):
+            if k == i or k == j:
+                continue
+            a, b, c = sorted((i, j, k))
+            error = values[a * n + b] + values[b * n + c] - values[a * n + c]
+            if math.isnan(error):
+                continue
+            t = triad_index[(a, b, c)]
+            previous = self.triad_errors[t]
+            if math.isnan(previous):
+                self.closed_triads += 1
+                previous = 0.0
+            self.sum_squares += error * error - previous * previous
+            self.triad_errors[t] = error
+
+    def approx_gci(self):
+        """Kapalı üçlülerden tahmini GCI; yeterli üçlü yoksa None"""
+        if self.n < 3 or self.closed_triads < MIN_TRIADS:
+            return None
+        return max(self.sum_squares, 0.0) / self.closed_triads / 3.0
+
+    def approx_cr(self):
+        """GCI'yı eşik oranıyla CR ölçeğine taşı"""
+        gci = self.approx_gci()
+        if gci is None:
+            return None
+        threshold = GCI_THRESHOLDS.get(self.n, GCI_THRESHOLD_DEFAULT)
+        return CR_THRESHOLD * gci / threshold
+
+    def worst_triads(self, count=3):
+        """En çelişkili üçlüleri harf olarak döndür"""
+        triads = get_layout(self.stage_key, self.survey_id).triads
+        ranked = sorted(
+            (t for t, error in enumerate(self.triad_errors) if error == error and error),
+            key=lambda t: -abs(self.triad_errors[t]),
+        )
+        return [tuple(self.letters[x].upper() for x in triads[t]) for t in ranked[:count]]
+
+
+def tracker_from_codes(stage_key, codes, survey_id=DEFAULT_SURVEY):
+    """Çift konumu sırasındaki kod dizisinden takipçiyi yeniden oluştur"""
+    layout = get_layout(stage_key, survey_id)
+    tracker = ConsistencyTracker(stage_key, survey_id)
+    for p, code in enumerate(codes):
+        if code != MISSING:
+            tracker.update(int(layout.rows[p]), int(layout.cols[p]), code)
+    return tracker
@@ -0,0 +1,109 @@
+"""Değerlendirme kriterleri: surveys/ dizinindeki anket tanımları.
+
+Her JSON dosyası bir değerlendirme turunu tanımlar; dosya adı anket
+kimliğidir ve uygulamada ?anket=<kimlik> ile seçilir. Tanımlar süreç başına
+bir kez okunup doğrulanır ve tüm oturumlarca paylaşılır.
+"""
+import json
+import os
+import re
+from functools import lru_cache
+
+SURVEY_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "surveys")
+
+# Adres parametresi verilmediğinde açılan anket
+DEFAULT_SURVEY = "netzero"
+
+# Anket kimlikleri dosya adıdır; dizin dışına çıkılamasın diye kısıtlanır
+SURVEY_ID_PATTERN = re.compile(r"^[a-z0-9_-]{1,64}$")
+
+# Aşama anahtarları oturum durumu anahtarlarında ve sekme kimliklerinde kullanılır
+STAGE_KEY_PATTERN = re.compile(r"^[a-z][a-z0-9_]{0,31}$")
+
+# Arayüzün kendi sayfa/sekme kimlikleri; aşama anahtarı olarak kullanılamaz
+RESERVED_STAGE_KEYS = frozenset({"welcome", "results"})
+
+# Aşama başına kriter sınırı (Saaty rastgele indeksi n = 15'e kadar tanımlı)
+MIN_CRITERIA, MAX_CRITERIA = 2, 15
+
+
+class Survey:
+    """Doğrulanmış, değiştirilmeyen anket tanımı"""
+
+    def __init__(self, survey_id, definition):
+        self.survey_id = survey_id
+        self.title = definition["title"]
+        self.icon = definition.get("icon", "📋")
+        self.description = definition.get("description", "")
+        self.spreadsheet_id = definition.get("spreadsheet_id")
+
+        # Sözlüğe çevirmeden önce: tekrarlı anahtar öncekinin üzerine yazardı
+        keys = [stage.get("key") for stage in definition["stages"]]
+        if not keys or len(set(keys)) != len(keys):
+            raise ValueError(f"{survey_id}: aşama anahtarları boş ya da tekrarlı")
+        for key in keys:
+            if not isinstance(key, str) or not STAGE_KEY_PATTERN.match(key) or key in RESERVED_STAGE_KEYS:
+                raise ValueError(f"{survey_id}: geçersiz aşama anahtarı {key!r} "
+                                 f"(küçük harf, rakam ve _; ayrılmış: {', '.join(sorted(RESERVED_STAGE_KEYS))})")
+
+        # CRITERIA ile aynı biçim: {aşama: {"name", "criteria": [(harf, ad, açıklama)]}}
+        self.criteria = {
+            stage["key"]: {
+                "name": stage["name"],
+                "criteria": [tuple(c) for c in stage["criteria"]],
+            }
+            for stage in definition["stages"]
+        }
+        self.stages = tuple(self.criteria)
+        self.tab_labels = {stage["key"]: stage.get("tab", stage["name"]) for stage in definition["stages"]}
+        self.short_names = {stage["key"]: stage.get("short", stage["name"]) for stage in definition["stages"]}
+
+        # Aşamalar arası karşılaştırmanın kriterleri, sırasıyla diğer aşamalardır
+        self.comparison_stage = definition.get("comparison_stage")
+        self.substages = tuple(s for s in self.stages if s != self.comparison_stage) \
+            if self.comparison_stage else ()
+
+        self.n_criteria = {s: len(stage["criteria"]) for s, stage in self.criteria.items()}
+        self.n_pairs = {s: n * (n - 1) // 2 for s, n in self.n_criteria.items()}
+        self.total_pairs = sum(self.n_pairs.values())
+
+        self._validate()
+
+    def _validate(self):
+        for stage, n in self.n_criteria.items():
+            if not MIN_CRITERIA <= n <= MAX_CRITERIA:
+                raise ValueError(f"{self.survey_id}/{stage}: kriter sayısı {MIN_CRITERIA}-{MAX_CRITERIA} olmalı")
+            letters = [c[0] for c in self.criteria[stage]["criteria"]]
+            if len(set(letters)) != n or any(len(letter) != 1 or not letter.isalpha() for letter in letters):
+                raise ValueError(f"{self.survey_id}/{stage}: kriter harfleri tek ve farklı harf olmalı")
+            if any(len(c) != 3 for c in self.criteria[stage]["criteria"]):
+                raise ValueError(f"{self.survey_id}/{stage}: kriterler [harf, ad, açıklama] olmalı")
+        if self.comparison_stage is not None:
+            if self.comparison_stage not in self.criteria:
+                raise ValueError(f"{self.survey_id}: comparison_stage tanımlı bir aşama olmalı")
+            if self.n_criteria[self.comparison_stage] != len(self.substages):
+                raise ValueError(f"{self.survey_id}: aşamalar arası kriter sayısı aşama sayısına eşit olmalı")
+
+
+def available_surveys():
+    """surveys/ dizinindeki anket kimlikleri"""
+    return sorted(
+        name[:-len(".json")] for name in os.listdir(SURVEY_DIR)
+        if name.endswith(".json") and SURVEY_ID_PATTERN.match(name[:-len(".json")])
+    )
+
+
+@lru_cache(maxsize=None)
+def load_survey(survey_id=DEFAULT_SURVEY):
+    """Anketi süreç başına bir kez oku ve doğrula; bilinmeyen kimlikte ValueError"""
+    if not SURVEY_ID_PATTERN.match(survey_id or ""):
+        raise ValueError(f"Geçersiz anket kimliği: {survey_id!r}")
+    path = os.path.join(SURVEY_DIR, f"{survey_id}.json")
+    if not os.path.exists(path):
+        raise ValueError(f"Anket bulunamadı: {survey_id}")
+    with open(path, "r", encoding="utf-8") as f:
+        return Survey(survey_id, json.load(f))
+
+
+# Varsayılan anketin kriterleri (analiz ve raporlama modülleri bunu kullanır)
+CRITERIA = load_survey(DEFAULT_SURVEY).criteria
@@ -0,0 +1,194 @@
+"""Düzenleyici paneli: tüm değerlendirmeler üzerinden canlı grup sonuçları.
+
+Tüm izleyiciler süreç genelinde tek LiveResults nesnesini paylaşır. Yenileme
+en fazla REFRESH_INTERVAL saniyede bir yapılır; yalnızca tabloya yeni eklenen
+satırlar okunur ve grup biriktiricilerine eklenir. Aynı değerlendirmenin
+sonraki satırları (yeniden kayıt, yerel yedekten aktarım) öncekinin yerine geçer.
+"""
+import threading
+import time
+from datetime import datetime
+
+import numpy as np
+import streamlit as st
+
+from aggregation import GroupAggregator
+from ahp import CR_THRESHOLD, STAGES, SUBSTAGES, global_weights
+from criteria import CRITERIA
+from loader import CACHE_DIR, ResultsCache, sync
+from sheets import GOOGLE_SHEETS_AVAILABLE, get_worksheet
+
+# Paylaşılan sonuçların yenilenme aralığı (saniye); panel de bu aralıkla çizilir
+REFRESH_INTERVAL = 30
+
+# CR dağılımı kova sınırları
+CR_BINS = [0.0, 0.05, 0.1, 0.15, 0.2, 0.3, np.inf]
+
+
+class LiveResults:
+    """Artımlı eşitlenen önbellek, grup birleştirici ve bireysel CR değerleri.
+
+    Kilit yalnızca yenilemeyi (ağ okuması dahil) tekilleştirir. Her yenilemenin
+    sonunda değişmez bir anlık görüntü yayımlanır; okuyucular kilidi beklemeden
+    son yayımlanan görüntüyü alır.
+    """
+
+    def __init__(self, worksheet, cache_dir=CACHE_DIR):
+        self._lock = threading.Lock()
+        self.worksheet = worksheet
+        self.cache_dir = cache_dir
+        self.cache = ResultsCache.load(cache_dir)
+        self.aggregator = GroupAggregator()
+        # Değerlendirme kimliği -> aşama başına bireysel CR
+        self.cr = {}
+        self.last_refresh = None
+        self.last_error = None
+        self._snapshot = None
+        self._ingest(0)
+        self._publish()
+
+    def _ingest(self, start):
+        """Önbellekte start'tan sonraki değerlendirmeleri birleştiriciye ekle"""
+        end = len(self.cache)
+        if start == end:
+            return
+        submission_ids = self.cache.submission_ids[start:end]
+        evaluated = self.aggregator.add_many(
+            submission_ids,
+            {stage: self.cache.codes[stage][start:end] for stage in STAGES},
+            self.cache.expert_orgs[start:end],
+        )
+        for row, submission_id in enumerate(submission_ids):
+            self.cr[submission_id] = {stage: evaluated[stage].cr[row] for stage in STAGES}
+
+    def refresh(self):
+        """Aralık dolduysa yeni satırları çek; başka izleyici yeniliyorsa bekleme"""
+        if not self._lock.acquire(blocking=False):
+            return
+        try:
+            if self.last_refresh and time.time() - self.last_refresh < REFRESH_INTERVAL:
+                return
+            start, consumed = len(self.cache), self.cache.row_count
+            try:
+                sync(self.cache, self.worksheet)
+                self.last_error = None
+            except Exception as e:
+                print(f"Sonuç eşitleme hatası: {e}")
+                self.last_error = str(e)
+            self.last_refresh = time.time()
+            if self.cache.row_count != consumed:
+                self.cache.save(self.cache_dir)
+            self._ingest(start)
+            self._publish()
+        finally:
+            self._lock.release()
+
+    def _publish(self):
+        """Güncel sonuçları tek bir başvuru ataması ile yayımla (kilit altında çağrılır)"""
+        cr = {stage: np.array([values[stage] for values in self.cr.values()], dtype=float)
+              for stage in STAGES}
+        self._snapshot = (self.aggregator.results(), cr, len(self.aggregator.submissions))
+
+    def snapshot(self):
+        """Son yayımlanan tutarlı görüntü: (grup sonuçları, CR'ler, değerlendirme sayısı)"""
+        return self._snapshot
+
+
+@st.cache_resource
+def get_live_results(spreadsheet_id, _credentials_dict):
+    """Tablo başına tek paylaşılan sonuç nesnesi"""
+    return LiveResults(get_worksheet(spreadsheet_id, _credentials_dict))
+
+
+def criterion_names(stage_key):
+    return [f"{letter.upper()}. {name.strip()}" for letter, name, _ in CRITERIA[stage_key]["criteria"]]
+
+
+def display_stage(stage_key, result, cr):
+    """Bir aşamanın grup öncelikleri ve bireysel CR dağılımı"""
+    if np.isnan(result.aij_weights).any():
+        st.info("Bu aşamanın tüm çiftleri henüz yanıtlanmadı.")
+        return
+
+    names = criterion_names(stage_key)
+    order = np.argsort(-result.aij_weights, kind="stable")
+    st.dataframe(
+        [
+            {
+                "Sıra": rank + 1,
+                "Kriter": names[k],
+                "AIJ": round(float(result.aij_weights[k]), 4),
+                "AIP (geometrik)": round(float(result.aip_geometric[k]), 4),
+            }
+            for rank, k in enumerate(order.tolist())
+        ],
+        hide_index=True,
+    )
+    st.caption(f"Grup matrisi CR: {result.aij_cr:.3f} · AIP'ye giren uzman: {result.n_experts} "
+               f"({result.n_partial} kısmi yanıtla, LLS tahmini)")
+
+    cr = cr[~np.isnan(cr)]
+    if len(cr):
+        counts, _ = np.histogram(cr, CR_BINS)
+        labels = [f"{k:02d} {low:.2f}–{high:.2f}" if np.isfinite(high) else f"{k:02d} >{low:.2f}"
+                  for k, (low, high) in enumerate(zip(CR_BINS, CR_BINS[1:]))]
+        st.bar_chart({"CR": labels, "Uzman": counts.tolist()}, x="CR", y="Uzman")
+        st.caption(f"CR ≤ {CR_THRESHOLD}: %{(cr <= CR_THRESHOLD).mean() * 100:.0f} "
+                   f"({len(cr)} tam değerlendirme)")
+
+
+def display_global_ranking(results):
+    """stage_comparison x aşama içi AIJ ağırlıklarıyla global kriter sıralaması"""
+    weights = global_weights({stage: results[stage].aij_weights for stage in STAGES})
+    if np.isnan(weights).any():
+        st.info("Global sıralama için tüm aşamalarda grup ağırlığı gerekli.")
+        return
+    labels = [(CRITERIA[stage]["name"], name) for stage in SUBSTAGES for name in criterion_names(stage)]
+    order = np.argsort(-weights, kind="stable")
+    st.dataframe(
+        [
+            {"Sıra": rank + 1, "Aşama": labels[k][0], "Kriter": labels[k][1],
+             "Global Ağırlık": round(float(weights[k]), 4)}
+            for rank, k in enumerate(order.tolist())
+        ],
+        hide_index=True,
+    )
+
+
+@st.fragment(run_every=REFRESH_INTERVAL)
+def live_dashboard(live):
+    """Zamanlayıcıyla kendini yenileyen panel; sayfanın geri kalanı yeniden çalışmaz"""
+    live.refresh()
+    results, cr, count = live.snapshot()
+
+    col1, col2 = st.columns(2)
+    col1.metric("Değerlendirme", count)
+    if live.last_refresh:
+        col2.metric("Son eşitleme", datetime.fromtimestamp(live.last_refresh).strftime('%H:%M:%S'))
+    if live.last_error:
+        st.warning(f"Son eşitleme başarısız; önceki sonuçlar gösteriliyor. ({live.last_error})")
+    if not count:
+        st.info("Henüz değerlendirme yok.")
+        return
+
+    tabs = st.tabs(["🌐 Global Sıralama"] + [CRITERIA[stage]["name"] for stage in STAGES])
+    with tabs[0]:
+        display_global_ranking(results)
+    for tab, stage in zip(tabs[1:], STAGES):
+        with tab:
+            display_stage(stage, results[stage], cr[stage])
+
+
+def results_dashboard():
+    """Sheets yapılandırıldıysa paylaşılan canlı sonuç panelini göster"""
+    credentials_dict = st.secrets.get("gcp_service_account", None)
+    spreadsheet_id = st.secrets.get("spreadsheet_id", None)
+    if not credentials_dict or not spreadsheet_id or not GOOGLE_SHEETS_AVAILABLE:
+        st.info("Canlı sonuçlar için gcp_service_account ve spreadsheet_id tanımlı olmalı.")
+        return
+    try:
+        live = get_live_results(spreadsheet_id, dict(credentials_dict))
+    except Exception as e:
+        st.error(f"Sonuç tablosuna bağlanılamadı: {e}")
+        return
+    live_dashboard(live)
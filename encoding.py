@@ -0,0 +1,143 @@
+"""Yanıtların sürümlü, sıkıştırılmış ikili kodlaması.
+
+Biçim (sürüm 2), base64 ile metne çevrilir:
+
+    [sürüm: 1 bayt][anket kimliği uzunluğu: 1 bayt][anket kimliği: ASCII]
+    [aşama sayısı: 1 bayt][her aşamanın kriter sayısı: 1'er bayt]
+    [her aşama için itertools.combinations sırasında çift başına 1 işaretli int8]
+
+Kod değerleri ahp modülündeki gibidir: 0 eşit, +k birinci kriter, -k ikinci
+kriter lehine k önem derecesi, MISSING yanıtlanmamış çift. Başlık anketi ve
+aşama düzenini taşır; aynı tabloyu paylaşan başka anketlerin satırları
+(düzenleri aynı olsa bile) atlanır. Anket kimliği olmayan sürüm 1 satırları
+ve eski JSON satırları ("a_b": "2a") varsayılan ankete aittir.
+"""
+import base64
+import binascii
+import json
+from functools import lru_cache
+
+import numpy as np
+
+from ahp import MISSING, decode_responses, get_layout
+from criteria import DEFAULT_SURVEY, load_survey
+
+FORMAT_VERSION = 2
+
+
+@lru_cache(maxsize=None)
+def _header(survey_id, version=FORMAT_VERSION):
+    survey = load_survey(survey_id)
+    layout = bytes([len(survey.stages)] + [survey.n_criteria[s] for s in survey.stages])
+    if version == 1:
+        return bytes([1]) + layout
+    name = survey_id.encode("ascii")
+    return bytes([version, len(name)]) + name + layout
+
+
+def _accepted_headers(survey_id):
+    """Ankete ait sayılan başlıklar; sürüm 1 yalnızca varsayılan ankette"""
+    if survey_id == DEFAULT_SURVEY:
+        return (_header(survey_id), _header(survey_id, 1))
+    return (_header(survey_id),)
+
+
+def encode_codes(stage_codes, survey_id=DEFAULT_SURVEY):
+    """Aşama başına kod dizilerini tek base64 metnine çevir"""
+    body = b"".join(np.asarray(stage_codes[s], dtype=np.int8).tobytes()
+                    for s in load_survey(survey_id).stages)
+    return base64.b64encode(_header(survey_id) + body).decode("ascii")
+
+
+def encode_responses(responses, survey_id=DEFAULT_SURVEY):
+    """Yanıt sözlüğünü sıkıştırılmış metne çevir"""
+    stage_codes = {s: decode_responses(s, [responses], survey_id)[0] for s in load_survey(survey_id).stages}
+    return encode_codes(stage_codes, survey_id)
+
+
+def is_compact(payload):
+    """JSON satırları '{' ile başlar; base64 bu karakteri içermez"""
+    return not payload.lstrip().startswith("{")
+
+
+@lru_cache(maxsize=None)
+def _stage_bounds(survey_id):
+    """Gövdede (başlıktan sonra) her aşamanın dilim sınırları ve gövde uzunluğu"""
+    survey = load_survey(survey_id)
+    bounds = {}
+    offset = 0
+    for s in survey.stages:
+        n_pairs = survey.n_pairs[s]
+        bounds[s] = (offset, offset + n_pairs)
+        offset += n_pairs
+    return bounds, offset
+
+
+def _check_legacy_row(data, stages):
+    """Eski JSON satırı {aşama: {"a_b": "2a"}} biçiminde değilse ValueError"""
+    if not isinstance(data, dict):
+        raise ValueError("JSON satırı sözlük değil")
+    for stage in stages:
+        responses = data.get(stage)
+        if responses is None:
+            continue
+        if not isinstance(responses, dict) or not all(isinstance(r, str) for r in responses.values()):
+            raise ValueError(f"{stage} yanıtları geçersiz")
+
+
+def decode_payload(payload, survey_id=DEFAULT_SURVEY):
+    """Tek satırı (sıkıştırılmış ya da JSON) aşama başına kod dizilerine çevir"""
+    return {s: codes[0] for s, codes in decode_payloads([payload], survey_id).items()}
+
+
+def decode_payloads(payloads, survey_id=DEFAULT_SURVEY):
+    """Çok sayıda satırı topluca (satır x çift) int8 kod matrislerine çevir.
+
+    Sıkıştırılmış satırlar tek bir bayt tamponunda birleştirilip numpy ile
+    dilimlenir; eski JSON satırları ahp.decode_responses ile çözülür.
+    Hatalı ya da başka ankete ait satırların tüm çiftleri MISSING olur.
+    """
+    stages = load_survey(survey_id).stages
+    result = {
+        s: np.full((len(payloads), get_layout(s, survey_id).n_pairs), MISSING, dtype=np.int8)
+        for s in stages
+    }
+
+    compact_rows, compact_data = [], []
+    json_rows, json_data = [], []
+    for row, payload in enumerate(payloads):
+        try:
+            if is_compact(payload):
+                compact_data.append(base64.b64decode(payload, validate=True))
+                compact_rows.append(row)
+            elif survey_id == DEFAULT_SURVEY:
+                data = json.loads(payload)
+                _check_legacy_row(data, stages)
+                json_data.append(data)
+                json_rows.append(row)
+        except (binascii.Error, ValueError):
+            continue
+
+    if compact_data:
+        # Başlığı ya da uzunluğu uymayan (başka anket/sürüm/düzen) satırlar atlanır
+        bounds, width = _stage_bounds(survey_id)
+        keep, bodies = [], []
+        for i, data in enumerate(compact_data):
+            for header in _accepted_headers(survey_id):
+                if len(data) == len(header) + width and data.startswith(header):
+                    keep.append(i)
+                    bodies.append(data[len(header):])
+                    break
+        buffer = np.frombuffer(b"".join(bodies), dtype=np.int8)
+        matrix = buffer.reshape(len(keep), width)
+        rows = np.array([compact_rows[i] for i in keep], dtype=np.intp)
+        for s, (start, end) in bounds.items():
+            result[s][rows] = matrix[:, start:end]
+
+    if json_data:
+        rows = np.array(json_rows, dtype=np.intp)
+        for s in stages:
+            result[s][rows] = decode_responses(s, json_data, survey_id)
+
+    return result
+
@@ -0,0 +1,114 @@
+"""Yanıt günlüğü: her tıklamayı yerel SQLite'a yazar, oturum kaldığı yerden sürer.
+
+Varsayılan yol kapsayıcının /tmp dizinidir; bu yalnızca bağlantı kopmalarına
+ve süreç yeniden başlatmalarına karşı korur. Pod yeniden başlatmalarında da
+oturumların sürmesi için DEGERLENDIRME_JOURNAL_PATH ortam değişkeni kalıcı
+bir birimdeki dosyayı göstermelidir.
+"""
+import itertools
+import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from operator import itemgetter
+
+import streamlit as st
+
+JOURNAL_PATH = os.environ.get("DEGERLENDIRME_JOURNAL_PATH", "/tmp/degerlendirme_journal.sqlite3")
+
+# Yanıt dışı kayıtların anahtarları; pair_key'ler "a_b" biçiminde olduğu
+# için '#' ile başlayan anahtarlarla çakışmaz
+META_STAGE = "#meta"
+POSITION_KEY = "#pos"
+ADAPTIVE_KEY = "#adaptive"
+
+
+def new_session_token():
+    """Tahmin edilemeyen, URL'de taşınabilir oturum kodu"""
+    return uuid.uuid4().hex
+
+
+class Journal:
+    """Yalnızca ekleme/güncelleme yapılan oturum günlüğü (WAL kipinde SQLite)"""
+
+    def __init__(self, path=JOURNAL_PATH):
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        # WAL + NORMAL: her yazım tek bir sıralı ekleme; süreç çökmesinde kayıp yok
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        # Birincil anahtar token ile başladığı için bir oturum tek aralık okumasıyla gelir
+        self._conn.execute(
+            """CREATE TABLE IF NOT EXISTS entries (
+                   token TEXT NOT NULL,
+                   stage TEXT NOT NULL,
+                   key TEXT NOT NULL,
+                   value TEXT NOT NULL,
+                   updated REAL NOT NULL,
+                   PRIMARY KEY (token, stage, key)
+               ) WITHOUT ROWID"""
+        )
+
+    def write(self, token, stage, key, value):
+        """Tek kaydı ekle ya da güncelle"""
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO entries VALUES (?, ?, ?, ?, ?)",
+                (token, stage, key, value, time.time()),
+            )
+
+    def record_meta(self, token, **values):
+        for key, value in values.items():
+            self.write(token, META_STAGE, key, json.dumps(value, ensure_ascii=False))
+
+    def record_answer(self, token, stage, pair_key, response):
+        self.write(token, stage, pair_key, response)
+
+    def record_position(self, token, stage, pair_idx):
+        self.write(token, stage, POSITION_KEY, str(pair_idx))
+
+    def record_adaptive(self, token, stage, order, finished):
+        self.write(token, stage, ADAPTIVE_KEY, json.dumps({"order": order, "finished": finished}))
+
+    def load(self, token):
+        """Oturumu tek indeksli okumayla geri yükle; yoksa None"""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT stage, key, value FROM entries WHERE token = ?", (token,)
+            ).fetchall()
+        if not rows:
+            return None
+        return parse_session(rows)
+
+    def sessions(self):
+        """Tüm oturumlar: (token, oturum, son güncelleme zamanı); tek sıralı tarama"""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT token, stage, key, value, updated FROM entries ORDER BY token"
+            ).fetchall()
+        for token, group in itertools.groupby(rows, key=itemgetter(0)):
+            group = list(group)
+            yield token, parse_session([row[1:4] for row in group]), max(row[4] for row in group)
+
+
+def parse_session(rows):
+    """(stage, key, value) satırlarını oturum sözlüğüne çevir"""
+    session = {"meta": {}, "responses": {}, "positions": {}, "adaptive": {}}
+    for stage, key, value in rows:
+        if stage == META_STAGE:
+            session["meta"][key] = json.loads(value)
+        elif key == POSITION_KEY:
+            session["positions"][stage] = int(value)
+        elif key == ADAPTIVE_KEY:
+            session["adaptive"][stage] = json.loads(value)
+        else:
+            session["responses"].setdefault(stage, {})[key] = value
+    return session
+
+
+@st.cache_resource
+def get_journal():
+    """Süreç genelinde tek günlük bağlantısı"""
+    return Journal()
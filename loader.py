@@ -0,0 +1,152 @@
+"""Sheets'teki değerlendirmelerin toplu yüklenmesi ve artımlı eşitlenmesi"""
+import json
+import os
+
+import numpy as np
+import streamlit as st
+
+from ahp import MISSING, STAGES, get_layout
+from encoding import decode_payloads
+from metrics import timed
+from sheets import get_worksheet, is_past_grid
+
+CACHE_DIR = "/tmp/degerlendirme_cache"
+
+# Satırlar bu büyüklükte parçalar halinde çözülür
+CHUNK_SIZE = 1000
+
+
+class ResultsCache:
+    """Sütunlu yerel önbellek: satır başına bilgiler ve aşama başına kod matrisleri"""
+
+    def __init__(self):
+        # Tablodan okunmuş satır sayısı (başlık dahil); sonraki okuma buradan başlar
+        self.row_count = 0
+        self.submission_ids = []
+        self.timestamps = []
+        self.expert_names = []
+        self.expert_orgs = []
+        self.codes = {
+            stage: np.empty((0, get_layout(stage).n_pairs), dtype=np.int8)
+            for stage in STAGES
+        }
+
+    def __len__(self):
+        return len(self.timestamps)
+
+    def append_rows(self, rows):
+        """Tablo satırlarını parça parça çözüp sütunlara ekle; eklenen sayıyı döndür.
+
+        Kimlik sütunu olmayan eski satırlar tablo satır numarasını kimlik alır.
+        Aynı kimlik birden çok satırda olabilir (yeniden kayıt); sütunlar tüm
+        satırları tutar, tekilleştirme okuyucunun işidir.
+        """
+        added = 0
+        new_codes = {stage: [] for stage in STAGES}
+        for start in range(0, len(rows), CHUNK_SIZE):
+            first_row = self.row_count + start + 1
+            chunk = [
+                (row, row[4] if len(row) > 4 and row[4] else f"satir-{first_row + k}")
+                for k, row in enumerate(rows[start:start + CHUNK_SIZE]) if len(row) >= 4
+            ]
+            decoded = decode_payloads([row[3] for row, _ in chunk])
+
+            # Başlık ya da bozuk satırların tüm çiftleri eksik çıkar
+            valid = np.zeros(len(chunk), dtype=bool)
+            for stage in STAGES:
+                valid |= (decoded[stage] != MISSING).any(axis=1)
+
+            for stage in STAGES:
+                new_codes[stage].append(decoded[stage][valid])
+            for (row, submission_id), ok in zip(chunk, valid.tolist()):
+                if ok:
+                    self.submission_ids.append(submission_id)
+                    self.timestamps.append(row[0])
+                    self.expert_names.append(row[1])
+                    self.expert_orgs.append(row[2])
+            added += int(valid.sum())
+
+        for stage in STAGES:
+            self.codes[stage] = np.concatenate([self.codes[stage]] + new_codes[stage])
+        self.row_count += len(rows)
+        return added
+
+    def save(self, cache_dir=CACHE_DIR):
+        """Önbelleği diske yaz (yarım kalan yazım eski dosyayı bozmaz)"""
+        os.makedirs(cache_dir, exist_ok=True)
+        codes_path = os.path.join(cache_dir, "codes.npz")
+        meta_path = os.path.join(cache_dir, "meta.json")
+
+        with open(codes_path + ".tmp", "wb") as f:
+            np.savez(f, **self.codes)
+        with open(meta_path + ".tmp", "w", encoding="utf-8") as f:
+            json.dump({
+                "row_count": self.row_count,
+                "submission_ids": self.submission_ids,
+                "timestamps": self.timestamps,
+                "expert_names": self.expert_names,
+                "expert_orgs": self.expert_orgs,
+            }, f, ensure_ascii=False)
+        os.replace(codes_path + ".tmp", codes_path)
+        os.replace(meta_path + ".tmp", meta_path)
+
+    @classmethod
+    def load(cls, cache_dir=CACHE_DIR):
+        """Diskteki önbelleği oku; yoksa, eski biçimdeyse ya da kriter düzeni değiştiyse boş başla"""
+        cache = cls()
+        try:
+            with open(os.path.join(cache_dir, "meta.json"), encoding="utf-8") as f:
+                meta = json.load(f)
+            with np.load(os.path.join(cache_dir, "codes.npz")) as data:
+                codes = {stage: data[stage] for stage in STAGES}
+            submission_ids = meta["submission_ids"]
+        except (OSError, KeyError, ValueError):
+            return cache
+
+        if any(codes[s].shape[1] != get_layout(s).n_pairs for s in STAGES):
+            return cache
+        cache.row_count = meta["row_count"]
+        cache.submission_ids = submission_ids
+        cache.timestamps = meta["timestamps"]
+        cache.expert_names = meta["expert_names"]
+        cache.expert_orgs = meta["expert_orgs"]
+        cache.codes = codes
+        return cache
+
+
+def sync(cache, worksheet):
+    """Yalnızca son eşitlemeden sonra eklenen satırları tek aralık okumasıyla çek"""
+    with timed("sheets_read"):
+        try:
+            rows = worksheet.get(f"A{cache.row_count + 1}:E")
+        except Exception as e:
+            # Tablonun sonundan sonrası: yeni satır yok
+            if not is_past_grid(e):
+                raise
+            rows = []
+    if not rows:
+        return 0
+    return cache.append_rows(rows)
+
+
+def sync_results(cache_dir=CACHE_DIR, full=False):
+    """Streamlit secrets'taki tabloyla yerel önbelleği eşitle ve döndür"""
+    credentials_dict = st.secrets.get("gcp_service_account", None)
+    spreadsheet_id = st.secrets.get("spreadsheet_id", None)
+    if not credentials_dict or not spreadsheet_id:
+        raise RuntimeError("gcp_service_account ve spreadsheet_id secrets içinde tanımlı olmalı")
+
+    cache = ResultsCache() if full else ResultsCache.load(cache_dir)
+    worksheet = get_worksheet(spreadsheet_id, dict(credentials_dict))
+    consumed = cache.row_count
+    sync(cache, worksheet)
+    if cache.row_count != consumed:
+        cache.save(cache_dir)
+    return cache
+
+
+if __name__ == "__main__":
+    import sys
+
+    cache = sync_results(full="--full" in sys.argv)
+    print(f"{len(cache)} değerlendirme yüklendi ({cache.row_count} tablo satırı)")
@@ -0,0 +1,201 @@
+"""Sıcak yol ölçümleri: süreç genelinde kilitsiz halka tampon ve Prometheus çıktısı"""
+import itertools
+import os
+import threading
+import time
+from array import array
+from contextlib import contextmanager
+from functools import lru_cache
+
+import numpy as np
+
+# Ölçülen işlemler; tamponda sıra numarasıyla tutulur
+OPERATIONS = (
+    "rerun",
+    "fragment_rerun",
+    "display_comparison",
+    "save_response",
+    "check_and_auto_save",
+    "sheets_open",
+    "sheets_append",
+    "sheets_read",
+    "sheets_replay",
+    "local_save",
+)
+OPERATION_INDEX = {name: k for k, name in enumerate(OPERATIONS)}
+
+# Tamponda tutulan son ölçüm sayısı
+CAPACITY = 65536
+
+# Histogram kova üst sınırları (saniye)
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# node_exporter textfile toplayıcısının okuyacağı dosya
+METRICS_PATH = os.environ.get("DEGERLENDIRME_METRICS_PATH", "/tmp/degerlendirme_metrics.prom")
+EXPORT_INTERVAL = 15.0
+
+
+class MetricsRecorder:
+    """Sabit boyutlu halka tampon ve süreç ömrü boyunca birikimli sayaçlar.
+
+    Yuva numarası itertools.count'tan alınır; next() GIL altında atomik
+    olduğundan yazarlar kilit beklemez. Aynı yuvaya eşzamanlı yazım ancak
+    tampon tam tur attığında olur ve yalnızca tek ölçümü bozar.
+
+    Yüzdelikler (yönetici sayfası) tampondaki son ölçümlerden hesaplanır.
+    Prometheus histogramı ise hiç azalmayan sayaçlardan yazılır; pencereden
+    hesaplansaydı eski ölçümler silindikçe düşer ve sayaç sıfırlanması
+    sanılırdı. Sayaçlar sıcak yolda değil, dışa aktarımda güncellenir: son
+    aktarımdan beri yazılan yuvalar toplu olarak eklenir. Aktarımlar arasında
+    tampon tam tur atarsa (EXPORT_INTERVAL içinde CAPACITY'den fazla ölçüm)
+    üzerine yazılan ölçümler sayaçlara girmez; sayaçlar yine de azalmaz.
+    """
+
+    def __init__(self, capacity=CAPACITY):
+        self.capacity = capacity
+        self._counter = itertools.count()
+        self._written = 0
+        self._operations = array("b", bytes(capacity))
+        self._durations = array("d", bytes(8 * capacity))
+        self._failed = array("b", bytes(capacity))
+        self._last_export = 0.0
+
+        # İşlem başına birikimli sayaçlar; kova dizisinin son sütunu +Inf kovası.
+        # Yalnızca _fold (dışa aktarım yolu) günceller.
+        self._fold_lock = threading.Lock()
+        self._folded = 0
+        self._bucket_totals = np.zeros((len(OPERATIONS), len(BUCKETS) + 1), dtype=np.int64)
+        self._sum_totals = np.zeros(len(OPERATIONS))
+        self._error_totals = np.zeros(len(OPERATIONS), dtype=np.int64)
+
+    def record(self, operation, duration, ok=True):
+        slot = next(self._counter)
+        self._written = slot + 1
+        slot %= self.capacity
+        self._operations[slot] = OPERATION_INDEX[operation]
+        self._durations[slot] = duration
+        self._failed[slot] = not ok
+
+    def _fold(self):
+        """Son katlamadan beri yazılan (ve henüz üzerine yazılmamış) yuvaları sayaçlara ekle"""
+        with self._fold_lock:
+            written = self._written
+            start = max(self._folded, written - self.capacity)
+            if written <= start:
+                return
+            slots = np.arange(start, written) % self.capacity
+            operations = np.frombuffer(self._operations, dtype=np.int8)[slots]
+            durations = np.frombuffer(self._durations, dtype=np.float64)[slots]
+            failed = np.frombuffer(self._failed, dtype=np.int8)[slots]
+            # le sınırlı kova: süreyi aşmayan ilk üst sınır
+            buckets = np.searchsorted(BUCKETS, durations, side="left")
+            np.add.at(self._bucket_totals, (operations, buckets), 1)
+            np.add.at(self._sum_totals, operations, durations)
+            np.add.at(self._error_totals, operations, failed)
+            self._folded = written
+
+    def totals(self):
+        """Süreç başından beri işlem başına {count, errors, sum, buckets (birikimli)}"""
+        self._fold()
+        with self._fold_lock:
+            cumulative = self._bucket_totals.cumsum(axis=1)
+            sums = self._sum_totals.copy()
+            errors = self._error_totals.copy()
+        return {
+            name: {
+                "count": int(cumulative[k, -1]),
+                "errors": int(errors[k]),
+                "sum": float(sums[k]),
+                "buckets": cumulative[k, :-1].tolist(),
+            }
+            for k, name in enumerate(OPERATIONS)
+            if cumulative[k, -1]
+        }
+
+    def snapshot(self):
+        """Tampondaki ölçümler: (işlem sıra no, süre, hata) dizileri"""
+        size = min(self._written, self.capacity)
+        operations = np.frombuffer(self._operations, dtype=np.int8)[:size].copy()
+        durations = np.frombuffer(self._durations, dtype=np.float64)[:size].copy()
+        failed = np.frombuffer(self._failed, dtype=np.int8)[:size].astype(bool)
+        return operations, durations, failed
+
+    def summary(self):
+        """İşlem başına {count, errors, sum, p50, p95, p99, buckets}"""
+        operations, durations, failed = self.snapshot()
+        result = {}
+        for k, name in enumerate(OPERATIONS):
+            mask = operations == k
+            values = durations[mask]
+            if not len(values):
+                continue
+            p50, p95, p99 = np.percentile(values, [50, 95, 99])
+            result[name] = {
+                "count": len(values),
+                "errors": int(failed[mask].sum()),
+                "sum": float(values.sum()),
+                "p50": p50,
+                "p95": p95,
+                "p99": p99,
+                # Her kova, sınırın altındaki (<=) ölçüm sayısı; Prometheus gibi birikimli
+                "buckets": np.searchsorted(np.sort(values), BUCKETS, side="right").tolist(),
+            }
+        return result
+
+    def to_prometheus(self):
+        """Birikimli sayaçları Prometheus metin biçiminde döndür"""
+        lines = [
+            "# HELP degerlendirme_latency_seconds İşlem süreleri",
+            "# TYPE degerlendirme_latency_seconds histogram",
+        ]
+        errors = ["# HELP degerlendirme_errors_total Başarısız işlemler",
+                  "# TYPE degerlendirme_errors_total counter"]
+        for name, stats in self.totals().items():
+            for bound, count in zip(BUCKETS, stats["buckets"]):
+                lines.append(f'degerlendirme_latency_seconds_bucket{{op="{name}",le="{bound}"}} {count}')
+            lines.append(f'degerlendirme_latency_seconds_bucket{{op="{name}",le="+Inf"}} {stats["count"]}')
+            lines.append(f'degerlendirme_latency_seconds_sum{{op="{name}"}} {stats["sum"]:.6f}')
+            lines.append(f'degerlendirme_latency_seconds_count{{op="{name}"}} {stats["count"]}')
+            errors.append(f'degerlendirme_errors_total{{op="{name}"}} {stats["errors"]}')
+        return "\n".join(lines + errors) + "\n"
+
+    def export(self, path=METRICS_PATH):
+        """Metin dosyasını atomik olarak yaz (okuyucu yarım dosya görmez)"""
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write(self.to_prometheus())
+        os.replace(tmp_path, path)
+        self._last_export = time.monotonic()
+
+    def maybe_export(self, path=METRICS_PATH):
+        """Son yazımdan bu yana EXPORT_INTERVAL geçtiyse dosyayı yenile"""
+        if time.monotonic() - self._last_export < EXPORT_INTERVAL:
+            return
+        try:
+            self.export(path)
+        except OSError as e:
+            print(f"Ölçüm dosyası yazılamadı: {e}")
+
+
+@lru_cache(maxsize=None)
+def get_recorder():
+    """Süreç genelinde tek tampon; arka plan iş parçacıkları da paylaşır"""
+    return MetricsRecorder()
+
+
+@contextmanager
+def timed(operation):
+    """Süreyi ölç; hem `with timed(...)` hem `@timed(...)` olarak kullanılır.
+
+    Streamlit'in st.rerun()/st.stop() denetim istisnaları BaseException
+    olduğundan hata sayılmaz.
+    """
+    start = time.perf_counter()
+    ok = True
+    try:
+        yield
+    except Exception:
+        ok = False
+        raise
+    finally:
+        get_recorder().record(operation, time.perf_counter() - start, ok)
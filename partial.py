@@ -0,0 +1,148 @@
+"""Eksik değerlendirmeler için log en küçük kareler (LLS) ağırlık tahmini.
+
+Yanıtlanan çiftler kriterler arasında bir karşılaştırma grafiği oluşturur.
+Log ağırlıklar yalnızca bu kenarlar üzerinden
+
+    min Σ (L_ij - (x_i - x_j))²
+
+problemiyle bulunur. Normal denklemlerin matrisi grafiğin Laplace
+matrisidir (Bᵀ diag(yanıtlandı) B, B: çift x kriter seyrek geliş matrisi);
+n en fazla 15 olduğundan tüm uzmanlar için (uzman x n x n) yığını tek
+seferde kurulup özdeğer ayrışımıyla çözülür. Tam yanıtlı bir aşamada
+sonuç geometrik ortalama yöntemiyle aynıdır.
+"""
+from functools import lru_cache
+from typing import NamedTuple
+
+import numpy as np
+
+from ahp import MISSING, codes_to_log_values, get_layout
+from criteria import DEFAULT_SURVEY
+
+# Serbestlik derecesi yokken (ör. ağaç biçimli grafik) varsayılan yargı
+# gürültüsü: log ölçekte bir önem adımının yaklaşık yarısı
+PRIOR_LOG_STD = 0.5
+
+# Bu değerin altındaki Laplace özdeğerleri sıfır sayılır (bileşen başına bir tane)
+EIGEN_TOL = 1e-9
+
+
+class PartialEstimate(NamedTuple):
+    """Toplu LLS sonucu; satırlar uzman, sütunlar kriter"""
+    weights: np.ndarray        # (uzman x n); bağlı olmayanlarda yalnızca bileşen içi oranlar anlamlı
+    n_answered: np.ndarray     # (uzman,)
+    n_components: np.ndarray   # (uzman,) karşılaştırma grafiğinin bileşen sayısı
+    connected: np.ndarray      # (uzman,) bool
+    residual_std: np.ndarray   # (uzman,) log ölçekte artık std; serbestlik derecesi yoksa NaN
+    log_std: np.ndarray        # (uzman x n) log ağırlık standart hatası; bağlı değilse inf
+
+
+@lru_cache(maxsize=None)
+def incidence(stage_key, survey_id=DEFAULT_SURVEY):
+    """(çift x n) geliş matrisi: çiftin birinci kriteri +1, ikincisi -1"""
+    layout = get_layout(stage_key, survey_id)
+    matrix = np.zeros((layout.n_pairs, layout.n))
+    pairs = np.arange(layout.n_pairs)
+    matrix[pairs, layout.rows] = 1.0
+    matrix[pairs, layout.cols] = -1.0
+    return matrix
+
+
+def estimate_codes(stage_key, codes, survey_id=DEFAULT_SURVEY):
+    """(uzman x çift) kod matrisinden kısmi yanıtlı ağırlık tahminleri"""
+    layout = get_layout(stage_key, survey_id)
+    n = layout.n
+    codes = np.asarray(codes).reshape(-1, layout.n_pairs)
+    answered = codes != MISSING
+    log_values = np.where(answered, codes_to_log_values(codes), 0.0)
+    edges = incidence(stage_key, survey_id)
+
+    lap = np.swapaxes(answered[:, :, np.newaxis] * edges, 1, 2) @ edges
+    rhs = log_values @ edges
+
+    # Laplace yarı-tersi; sıfır özdeğer sayısı bileşen sayısıdır
+    eigenvalues, eigenvectors = np.linalg.eigh(lap)
+    zero = eigenvalues < EIGEN_TOL
+    inverse = np.where(zero, 0.0, 1.0 / np.where(zero, 1.0, eigenvalues))
+    pinv = (eigenvectors * inverse[:, np.newaxis, :]) @ np.swapaxes(eigenvectors, 1, 2)
+    n_components = zero.sum(axis=-1)
+    connected = n_components == 1
+
+    log_w = np.einsum("eij,ej->ei", pinv, rhs)
+    weights = np.exp(log_w - log_w.max(axis=-1, keepdims=True))
+    weights /= weights.sum(axis=-1, keepdims=True)
+
+    # Artıklar ve serbestlik derecesi (yanıt sayısı - bağımsız parametre sayısı)
+    residuals = np.where(answered, log_values - log_w @ edges.T, 0.0)
+    n_answered = answered.sum(axis=-1)
+    dof = n_answered - (n - n_components)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        residual_std = np.where(dof > 0, np.sqrt((residuals ** 2).sum(axis=-1) / dof), np.nan)
+
+    # Cov(log w) = σ² L⁺; σ bilinmiyorsa varsayılan gürültü
+    sigma = np.where(dof > 0, residual_std, PRIOR_LOG_STD)
+    diagonal = np.clip(np.diagonal(pinv, axis1=1, axis2=2), 0.0, None)
+    log_std = np.where(connected[:, np.newaxis], sigma[:, np.newaxis] * np.sqrt(diagonal), np.inf)
+
+    return PartialEstimate(weights, n_answered, n_components, connected, residual_std, log_std)
+
+
+def summarize(stage_key, estimate, survey_id=DEFAULT_SURVEY):
+    """Aşama için özet: uzman sayısı, bağlı olan, ortalama yanıt oranı"""
+    n_pairs = get_layout(stage_key, survey_id).n_pairs
+    started = estimate.n_answered > 0
+    return {
+        "started": int(started.sum()),
+        "connected": int((started & estimate.connected).sum()),
+        "complete": int((estimate.n_answered == n_pairs).sum()),
+        "mean_coverage": float(estimate.n_answered[started].mean() / n_pairs) if started.any() else 0.0,
+    }
+
+
+if __name__ == "__main__":
+    import sys
+    from datetime import datetime
+
+    from ahp import decode_responses
+    from criteria import load_survey
+    from journal import Journal
+    from storage import get_store
+
+    # Kullanım: python partial.py [anket] [--store]
+    # Anketin günlükte kaydedilmeden bırakılmış oturumlarını özetler; --store ile
+    # grafiği en az bir aşamada bağlı olanları yerel depoya ekler (sonra storage.py replay)
+    arguments = [arg for arg in sys.argv[1:] if not arg.startswith("--")]
+    survey = load_survey(arguments[0] if arguments else DEFAULT_SURVEY)
+    stages = survey.stages
+    unfinished = [
+        (token, session, updated)
+        for token, session, updated in Journal().sessions()
+        if not session["meta"].get("auto_saved", False)
+        and session["meta"].get("survey_id", DEFAULT_SURVEY) == survey.survey_id
+    ]
+    responses = [session["responses"] for _, session, _ in unfinished]
+    codes = {s: decode_responses(s, responses, survey.survey_id) for s in stages}
+    estimates = {s: estimate_codes(s, codes[s], survey.survey_id) for s in stages}
+
+    print(f"{survey.survey_id}: {len(unfinished)} kaydedilmemiş oturum")
+    for stage in stages:
+        summary = summarize(stage, estimates[stage], survey.survey_id)
+        print(f"{stage:<18} başlanan: {summary['started']:>5}  bağlı: {summary['connected']:>5}  "
+              f"tam: {summary['complete']:>5}  ortalama kapsama: {summary['mean_coverage']:.0%}")
+
+    if "--store" in sys.argv:
+        store = get_store()
+        recovered = 0
+        for row, (token, session, updated) in enumerate(unfinished):
+            if not any(estimates[s].connected[row] and estimates[s].n_answered[row] for s in stages):
+                continue
+            store.upsert({
+                "submission_id": token,
+                "timestamp": datetime.fromtimestamp(updated).strftime('%Y-%m-%d %H:%M:%S'),
+                "expert_name": session["meta"].get("expert_name", ""),
+                "expert_org": session["meta"].get("expert_org", ""),
+                "survey_id": survey.survey_id,
+                "responses": session["responses"],
+            })
+            recovered += 1
+        print(f"{recovered} kısmi değerlendirme yerel depoya eklendi")
@@ -0,0 +1,108 @@
+"""Proje başvurularının hiyerarşik ağırlıklarla puanlanması ve Excel'e aktarımı"""
+import numpy as np
+from openpyxl import Workbook, load_workbook
+
+from ahp import SUBSTAGES, global_weights
+from criteria import CRITERIA
+
+# Excel'e parça parça yazılan satır sayısı
+CHUNK_SIZE = 5000
+
+
+def criterion_columns():
+    """Global ağırlık sırasıyla (aşama, harf, kriter adı) listesi"""
+    return [
+        (stage, letter, name)
+        for stage in SUBSTAGES
+        for letter, name, _ in CRITERIA[stage]["criteria"]
+    ]
+
+
+def criterion_labels():
+    """Puan tablosu başlıklarında kullanılan 'stage2:a' biçimindeki etiketler"""
+    return [f"{stage}:{letter}" for stage, letter, _ in criterion_columns()]
+
+
+def read_project_scores(path):
+    """Excel'den proje puanlarını oku.
+
+    İlk satır başlıktır: ilk sütun proje adı/kodu, diğerleri criterion_labels()
+    etiketleri (sıra önemli değil). Boş puanlar 0 sayılır.
+    """
+    workbook = load_workbook(path, read_only=True, data_only=True)
+    rows = workbook.active.iter_rows(values_only=True)
+    header = next(rows)
+
+    labels = criterion_labels()
+    positions = {str(label).strip(): col for col, label in enumerate(header) if label is not None}
+    missing = [label for label in labels if label not in positions]
+    if missing:
+        raise ValueError(f"Puan tablosunda eksik kriter sütunları: {', '.join(missing)}")
+    columns = [positions[label] for label in labels]
+
+    project_ids, scores = [], []
+    for row in rows:
+        if row[0] is None:
+            continue
+        project_ids.append(str(row[0]))
+        scores.append([row[c] or 0 for c in columns])
+    workbook.close()
+    return project_ids, np.array(scores, dtype=float).reshape(len(project_ids), len(labels))
+
+
+def score_projects(scores, weights):
+    """Tüm projelerin toplam puanı tek matris çarpımıyla; sıralama büyükten küçüğe"""
+    totals = scores @ weights
+    order = np.argsort(-totals, kind="stable")
+    return totals, order
+
+
+def export_ranking(path, project_ids, scores, weights):
+    """Sıralamayı ve kriter katkılarını yalnızca-yazma kipinde Excel'e aktar.
+
+    Katkılar (puan x ağırlık) parça parça hesaplanıp yazılır; bellek
+    kullanımı portföy büyüklüğüyle birlikte büyümez.
+    """
+    totals, order = score_projects(scores, weights)
+    columns = criterion_columns()
+
+    workbook = Workbook(write_only=True)
+    ranking = workbook.create_sheet("Sıralama")
+    ranking.append(["Sıra", "Proje", "Toplam Puan"]
+                   + [f"{stage}:{letter} {name.strip()}" for stage, letter, name in columns])
+    for start in range(0, len(order), CHUNK_SIZE):
+        chunk = order[start:start + CHUNK_SIZE]
+        contributions = scores[chunk] * weights
+        for offset, (project, total, row) in enumerate(
+                zip(chunk.tolist(), totals[chunk].tolist(), contributions.tolist())):
+            ranking.append([start + offset + 1, project_ids[project], total] + row)
+
+    weight_sheet = workbook.create_sheet("Ağırlıklar")
+    weight_sheet.append(["Aşama", "Kriter", "Ad", "Global Ağırlık"])
+    for (stage, letter, name), weight in zip(columns, weights.tolist()):
+        weight_sheet.append([CRITERIA[stage]["name"], letter.upper(), name.strip(), weight])
+
+    workbook.save(path)
+
+
+if __name__ == "__main__":
+    import sys
+
+    from aggregation import GroupAggregator
+    from loader import ResultsCache
+
+    # Kullanım: python portfolio.py projeler.xlsx siralama.xlsx
+    cache = ResultsCache.load()
+    aggregator = GroupAggregator()
+    aggregator.add_many(cache.submission_ids, cache.codes, cache.expert_orgs)
+    results = aggregator.results()
+    missing = [stage for stage, result in results.items() if np.isnan(result.aij_weights).any()]
+    if missing:
+        # Yanıtlanmamış çift varsa grup ağırlığı yok; NaN sıralama yazılmasın
+        sys.exit(f"Grup ağırlığı hesaplanamayan aşamalar (yanıtlanmamış çift var): "
+                 f"{', '.join(CRITERIA[stage]['name'] for stage in missing)}")
+    weights = global_weights({stage: results[stage].aij_weights for stage in results})
+
+    project_ids, scores = read_project_scores(sys.argv[1])
+    export_ranking(sys.argv[2], project_ids, scores, weights)
+    print(f"{len(project_ids)} proje sıralandı: {sys.argv[2]}")
@@ -0,0 +1,152 @@
+"""Aşama ağırlıklarının Monte Carlo duyarlılık ve sıra değişimi analizi.
+
+Global ağırlık = stage_comparison ağırlığı x aşama içi kriter ağırlığı.
+Her simülasyonda tüm uzmanların yargıları arayüzdeki 1-3 önem ölçeğinde
+rastgele bir adım kaydırılır, yargılar geometrik ortalamayla (AIJ)
+birleştirilir ve global ağırlıklar yeniden hesaplanır.
+"""
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import NamedTuple
+
+import numpy as np
+
+from ahp import SAATY_SCALE, SUBSTAGES, get_layout, global_weights, principal_eigenvector
+
+# Bir yargının bir adım kayma olasılığı (yarısı yukarı, yarısı aşağı)
+PERTURB_PROBABILITY = 0.3
+
+# İşçi başına bir partide çalıştırılan simülasyon sayısı
+BATCH_SIZE = 5000
+
+# Kod ölçeği (-3..3) ve bir adım aşağı/yukarı kaydırılmış log değerleri
+CODE_VALUES = np.arange(-3, 4)
+LOG_VALUES = np.sign(CODE_VALUES) * np.log(SAATY_SCALE[np.abs(CODE_VALUES)])
+LOG_VALUES_DOWN = LOG_VALUES[np.clip(np.arange(7) - 1, 0, 6)]
+LOG_VALUES_UP = LOG_VALUES[np.clip(np.arange(7) + 1, 0, 6)]
+
+
+class SensitivityReport(NamedTuple):
+    """Kriter başına (aşama sırasıyla birleştirilmiş) özet"""
+    labels: list             # "stage2:a" biçiminde kriter etiketleri
+    baseline: np.ndarray     # Pertürbasyonsuz global ağırlıklar
+    mean: np.ndarray
+    lower: np.ndarray        # Güven aralığı alt sınırı
+    upper: np.ndarray        # Güven aralığı üst sınırı
+    baseline_rank: np.ndarray  # 1 = en önemli
+    rank_change: np.ndarray  # Sıranın değişme olasılığı
+    top_probability: np.ndarray  # Kriterin 1. sırada çıkma olasılığı
+    n_simulations: int
+
+
+def code_counts(codes):
+    """(çift x 7): her çiftte -3..3 kodlarının her birini veren uzman sayısı"""
+    codes = np.asarray(codes)
+    return np.stack([(codes == c).sum(axis=0) for c in CODE_VALUES], axis=-1)
+
+
+def _perturbed_mean_log(counts, batch, rng, probability):
+    """(parti x çift) boyutunda kaydırılmış yargıların log ortalaması (AIJ).
+
+    Her uzmanın yargısı olasılıkla bir adım aşağı/yukarı kayar. Aynı çiftte
+    aynı kodu veren uzmanlar bağımsız olduğundan kayan uzman sayıları iki
+    binom çekimiyle tam olarak örneklenir; maliyet uzman sayısından bağımsızdır.
+    """
+    pair_idx, code_idx = np.nonzero(counts)
+    n = counts[pair_idx, code_idx]
+    down = rng.binomial(n, probability / 2, size=(batch, len(n)))
+    up = rng.binomial(n - down, probability / 2 / (1 - probability / 2))
+
+    # Kaymaların log toplamına etkisi, gruplardan çiftlere toplanır
+    delta = (down * (LOG_VALUES_DOWN - LOG_VALUES)[code_idx]
+             + up * (LOG_VALUES_UP - LOG_VALUES)[code_idx])
+    to_pairs = np.zeros((len(n), counts.shape[0]))
+    to_pairs[np.arange(len(n)), pair_idx] = 1.0
+
+    total = counts @ LOG_VALUES + delta @ to_pairs
+    return total / counts.sum(axis=-1)
+
+
+def _stage_weights(stage_key, counts, batch, rng, probability):
+    """Bir aşama için (parti x n) grup ağırlıkları"""
+    layout = get_layout(stage_key)
+    mean_log = _perturbed_mean_log(counts, batch, rng, probability)
+
+    matrices = np.ones((batch, layout.n, layout.n))
+    matrices[:, layout.rows, layout.cols] = np.exp(mean_log)
+    matrices[:, layout.cols, layout.rows] = np.exp(-mean_log)
+    return principal_eigenvector(matrices)[0]
+
+
+def _ranks(weights):
+    """Büyükten küçüğe sıra (1 = en önemli)"""
+    return np.argsort(np.argsort(-weights, axis=-1), axis=-1) + 1
+
+
+def _simulate(args):
+    """İşçi süreç: bir parti simülasyon çalıştır, özet istatistikleri döndür"""
+    stage_counts, batch, seed, probability, baseline_rank = args
+    rng = np.random.default_rng(seed)
+    stage_weights = {
+        stage: _stage_weights(stage, counts, batch, rng, probability)
+        for stage, counts in stage_counts.items()
+    }
+    weights = global_weights(stage_weights)
+    ranks = _ranks(weights)
+    return weights, (ranks != baseline_rank).sum(axis=0), (ranks == 1).sum(axis=0)
+
+
+def run_sensitivity(stage_codes, n_simulations=200_000, probability=PERTURB_PROBABILITY,
+                    confidence=0.95, seed=None, workers=None):
+    """Tüm uzmanların kodları üzerinde paralel Monte Carlo analizi.
+
+    stage_codes: {aşama: (uzman x çift) int8 kod matrisi}; stage_comparison ve
+    SUBSTAGES aşamalarını içermeli, her çift en az bir uzmanca yanıtlanmış olmalı.
+    """
+    # İşçilere uzman kodları yerine yalnızca çift başına kod sayıları gider
+    stage_counts = {s: code_counts(stage_codes[s]) for s in ("stage_comparison",) + SUBSTAGES}
+    zero = np.random.default_rng(0)
+    baseline = global_weights({
+        stage: _stage_weights(stage, counts, 1, zero, 0.0)
+        for stage, counts in stage_counts.items()
+    })[0]
+    baseline_rank = _ranks(baseline)
+
+    sizes = [BATCH_SIZE] * (n_simulations // BATCH_SIZE)
+    if n_simulations % BATCH_SIZE:
+        sizes.append(n_simulations % BATCH_SIZE)
+    seeds = np.random.SeedSequence(seed).spawn(len(sizes))
+    tasks = [(stage_counts, size, s, probability, baseline_rank) for size, s in zip(sizes, seeds)]
+
+    with ProcessPoolExecutor(max_workers=workers or os.cpu_count()) as pool:
+        parts = list(pool.map(_simulate, tasks))
+
+    weights = np.concatenate([p[0] for p in parts])
+    rank_changes = sum(p[1] for p in parts)
+    top_counts = sum(p[2] for p in parts)
+    tail = (1 - confidence) / 2 * 100
+
+    labels = [f"{stage}:{letter}" for stage in SUBSTAGES for letter in get_layout(stage).letters]
+    return SensitivityReport(
+        labels=labels,
+        baseline=baseline,
+        mean=weights.mean(axis=0),
+        lower=np.percentile(weights, tail, axis=0),
+        upper=np.percentile(weights, 100 - tail, axis=0),
+        baseline_rank=baseline_rank,
+        rank_change=rank_changes / n_simulations,
+        top_probability=top_counts / n_simulations,
+        n_simulations=n_simulations,
+    )
+
+
+if __name__ == "__main__":
+    from loader import ResultsCache
+
+    cache = ResultsCache.load()
+    report = run_sensitivity(cache.codes)
+    print(f"{len(cache)} uzman, {report.n_simulations} simülasyon")
+    for k in np.argsort(report.baseline_rank):
+        print(f"{report.baseline_rank[k]:>3}. {report.labels[k]:<22} "
+              f"{report.baseline[k]:.4f} [{report.lower[k]:.4f}, {report.upper[k]:.4f}] "
+              f"sıra değişimi: {report.rank_change[k]:.1%}")
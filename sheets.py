@@ -0,0 +1,192 @@
+"""Google Sheets bağlantısı ve arka planda çalışan kayıt kuyruğu"""
+import queue
+import random
+import threading
+import time
+
+import streamlit as st
+
+from criteria import DEFAULT_SURVEY
+from encoding import encode_responses
+from metrics import timed
+from storage import get_store, replay_to_sheets, save_record_locally
+
+# Google Sheets için
+try:
+    import gspread
+    from oauth2client.service_account import ServiceAccountCredentials
+    GOOGLE_SHEETS_AVAILABLE = True
+except ImportError:
+    GOOGLE_SHEETS_AVAILABLE = False
+
+SCOPE = ['https://spreadsheets.google.com/feeds',
+         'https://www.googleapis.com/auth/drive']
+
+# Tek append_rows çağrısında gönderilecek en fazla satır
+BATCH_SIZE = 50
+
+# Kota (429) ve sunucu (5xx) hatalarında üstel bekleme
+MAX_RETRIES = 6
+BACKOFF_BASE = 1.0
+BACKOFF_MAX = 32.0
+
+
+@timed("sheets_open")
+def open_worksheet(spreadsheet_id, credentials_dict):
+    """Yetkilendirilmiş istemciyle ilk çalışma sayfasını aç"""
+    credentials = ServiceAccountCredentials.from_json_keyfile_dict(
+        credentials_dict, SCOPE)
+    client = gspread.authorize(credentials)
+    return client.open_by_key(spreadsheet_id).sheet1
+
+
+@st.cache_resource
+def get_worksheet(spreadsheet_id, _credentials_dict):
+    """Süreç genelinde tek yetkilendirilmiş çalışma sayfası tutamacı (okumalar için)"""
+    return open_worksheet(spreadsheet_id, _credentials_dict)
+
+
+def record_to_row(record):
+    """Kayıt sözlüğünü tablo satırına çevir: zaman, ad, kurum, yanıtlar, kimlik.
+
+    Kimlik son sütundadır; yeniden kayıtlar ve yerel yedekten aktarımlar aynı
+    değerlendirmeyi birden çok satıra yazabilir, okuyucular kimliğe göre
+    son satırı alır.
+    """
+    payload = record["responses"]
+    if not isinstance(payload, str):
+        payload = encode_responses(payload, record.get("survey_id", DEFAULT_SURVEY))
+    return [
+        record["timestamp"],
+        record["expert_name"],
+        record["expert_org"],
+        payload,
+        record["submission_id"],
+    ]
+
+
+def is_retryable(error):
+    """Kota aşımı ve geçici sunucu hataları yeniden denenir"""
+    response = getattr(error, "response", None)
+    status = getattr(response, "status_code", None)
+    return status == 429 or (status is not None and status >= 500)
+
+
+def is_past_grid(error):
+    """Okunan aralık tablonun son satırından sonra başlıyor (400 "exceeds grid limits").
+
+    Eklemeler tabloyu yalnızca son veri satırına kadar büyütür; ilk 1000
+    satırdan sonra yeni satır yokken yapılan artımlı okuma bu hatayı verir.
+    """
+    response = getattr(error, "response", None)
+    return getattr(response, "status_code", None) == 400 and "exceeds grid limits" in str(error)
+
+
+class SaveTicket:
+    """Kuyruğa alınan bir kaydın durumu; arka plan iş parçacığı günceller"""
+
+    PENDING = "pending"
+    SAVED = "saved"
+    LOCAL = "local"
+    FAILED = "failed"
+
+    def __init__(self):
+        self.status = self.PENDING
+        self.done = threading.Event()
+
+    def resolve(self, status):
+        self.status = status
+        self.done.set()
+
+
+class SheetWriter:
+    """Bir anketin kayıtlarını kuyruktan toplu halde Sheets'e yazan tek yazıcı"""
+
+    def __init__(self, spreadsheet_id, credentials_dict, survey_id=DEFAULT_SURVEY):
+        self.spreadsheet_id = spreadsheet_id
+        self.credentials_dict = credentials_dict
+        self.survey_id = survey_id
+        self.queue = queue.Queue()
+        self._worksheet = None
+        self._thread = threading.Thread(target=self._run, name="sheet-writer", daemon=True)
+        self._thread.start()
+
+    def submit(self, record):
+        """Kaydı önce yerel depoya (aktarılmamış olarak) yaz, sonra kuyruğa al ve dön.
+
+        Kuyruk süreçle birlikte kaybolur; yerel kopya sayesinde yeniden
+        başlatmada kayıt bir sonraki aktarımla Sheets'e gider. Başarılı
+        eklemeden sonra kopya aktarıldı işaretlenir. Aktarım ile kuyruk aynı
+        kaydı iki kez yazarsa okuyucular kimliğe göre tekilleştirir.
+        """
+        save_record_locally(record)
+        ticket = SaveTicket()
+        self.queue.put((ticket, record))
+        return ticket
+
+    def worksheet(self):
+        """Çalışma sayfası tutamacı; ilk kullanımda bir kez açılır"""
+        if self._worksheet is None:
+            self._worksheet = open_worksheet(self.spreadsheet_id, self.credentials_dict)
+        return self._worksheet
+
+    def _next_batch(self):
+        batch = [self.queue.get()]
+        while len(batch) < BATCH_SIZE:
+            try:
+                batch.append(self.queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _append(self, rows):
+        for attempt in range(MAX_RETRIES):
+            try:
+                worksheet = self.worksheet()
+                with timed("sheets_append"):
+                    worksheet.append_rows(rows, value_input_option="RAW")
+                return
+            except Exception as e:
+                if not is_retryable(e) or attempt == MAX_RETRIES - 1:
+                    # Bağlantı bozulmuş olabilir; sonraki partide yeniden aç
+                    self._worksheet = None
+                    raise
+                delay = min(BACKOFF_MAX, BACKOFF_BASE * 2 ** attempt)
+                time.sleep(delay + random.uniform(0, delay / 2))
+
+    def _mark_synced(self, submission_ids):
+        try:
+            get_store().mark_synced(submission_ids)
+        except Exception as e:
+            print(f"Yerel kayıt işaretleme hatası: {e}")
+
+    def _replay_local(self):
+        """Bağlantı çalışıyor: anketin yerel depoda bekleyen kayıtlarını da aktar"""
+        try:
+            with timed("sheets_replay"):
+                replay_to_sheets(self.worksheet(), batch_size=BATCH_SIZE, survey_id=self.survey_id)
+        except Exception as e:
+            print(f"Yerel kayıt aktarım hatası: {e}")
+
+    def _run(self):
+        while True:
+            batch = self._next_batch()
+            try:
+                self._append([record_to_row(record) for _, record in batch])
+                for ticket, _ in batch:
+                    ticket.resolve(SaveTicket.SAVED)
+                # Aynı değerlendirmenin önceki yerel yedeği artık eskidi; aktarılmasın
+                self._mark_synced([record["submission_id"] for _, record in batch])
+                self._replay_local()
+            except Exception as e:
+                print(f"Google Sheets kayıt hatası: {e}")
+                # Yedek: Local kayıt
+                for ticket, record in batch:
+                    saved = save_record_locally(record)
+                    ticket.resolve(SaveTicket.LOCAL if saved else SaveTicket.FAILED)
+
+
+@st.cache_resource
+def get_writer(spreadsheet_id, _credentials_dict, survey_id=DEFAULT_SURVEY):
+    """Tablo ve anket başına tek yazıcı; tüm oturumlar paylaşır"""
+    return SheetWriter(spreadsheet_id, _credentials_dict, survey_id)
@@ -0,0 +1,185 @@
+"""Yerel yedek kayıt: tek SQLite dosyasında indeksli değerlendirme deposu"""
+import glob
+import json
+import os
+import sqlite3
+import threading
+from functools import lru_cache
+
+from criteria import DEFAULT_SURVEY
+from encoding import encode_responses
+from metrics import timed
+
+# Kalıcı bir birimde tutmak için DEGERLENDIRME_STORE_PATH ile değiştirilebilir
+STORE_PATH = os.environ.get("DEGERLENDIRME_STORE_PATH", "/tmp/degerlendirme_store.sqlite3")
+
+# Eski sürümün her kayıtta oluşturduğu dosyalar
+LEGACY_PATTERN = "/tmp/degerlendirme_*.json"
+
+
+class SubmissionStore:
+    """Değerlendirme kimliğine göre güncellenen (upsert) yerel depo"""
+
+    def __init__(self, path=STORE_PATH):
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            f"""CREATE TABLE IF NOT EXISTS submissions (
+                   submission_id TEXT PRIMARY KEY,
+                   timestamp TEXT NOT NULL,
+                   expert_name TEXT NOT NULL,
+                   expert_org TEXT NOT NULL,
+                   payload TEXT NOT NULL,
+                   synced INTEGER NOT NULL DEFAULT 0,
+                   survey TEXT NOT NULL DEFAULT '{DEFAULT_SURVEY}'
+               )"""
+        )
+        # Anket sütunundan önceki depolar: eski kayıtlar varsayılan ankete aittir
+        columns = {row[1] for row in self._conn.execute("PRAGMA table_info(submissions)")}
+        if "survey" not in columns:
+            self._conn.execute(
+                f"ALTER TABLE submissions ADD COLUMN survey TEXT NOT NULL DEFAULT '{DEFAULT_SURVEY}'")
+        for column in ("expert_name", "expert_org", "timestamp", "synced"):
+            self._conn.execute(
+                f"CREATE INDEX IF NOT EXISTS idx_submissions_{column} ON submissions ({column})")
+
+    def upsert(self, record, synced=False):
+        """Kaydı ekle; aynı değerlendirme yeniden kaydedilirse üzerine yaz"""
+        survey_id = record.get("survey_id", DEFAULT_SURVEY)
+        payload = record["responses"]
+        if not isinstance(payload, str):
+            payload = encode_responses(payload, survey_id)
+        with self._lock:
+            self._conn.execute(
+                """INSERT INTO submissions
+                       (submission_id, timestamp, expert_name, expert_org, payload, synced, survey)
+                   VALUES (?, ?, ?, ?, ?, ?, ?)
+                   ON CONFLICT (submission_id) DO UPDATE SET
+                       timestamp = excluded.timestamp,
+                       expert_name = excluded.expert_name,
+                       expert_org = excluded.expert_org,
+                       payload = excluded.payload,
+                       synced = excluded.synced,
+                       survey = excluded.survey""",
+                (record["submission_id"], record["timestamp"], record["expert_name"],
+                 record["expert_org"], payload, int(synced), survey_id),
+            )
+
+    def _query(self, sql, params=()):
+        with self._lock:
+            return self._conn.execute(sql, params).fetchall()
+
+    def latest_for_expert(self, expert_name):
+        """Uzmanın en son değerlendirmesi (timestamp, name, org, payload) ya da None"""
+        rows = self._query(
+            """SELECT timestamp, expert_name, expert_org, payload FROM submissions
+               WHERE expert_name = ? ORDER BY timestamp DESC LIMIT 1""",
+            (expert_name,),
+        )
+        return rows[0] if rows else None
+
+    def by_org(self, expert_org):
+        return self._query(
+            """SELECT timestamp, expert_name, expert_org, payload FROM submissions
+               WHERE expert_org = ? ORDER BY timestamp""",
+            (expert_org,),
+        )
+
+    def pending(self, limit=None, survey_id=DEFAULT_SURVEY):
+        """Anketin henüz Sheets'e aktarılmamış kayıtları: (submission_id, satır)"""
+        rows = self._query(
+            """SELECT submission_id, timestamp, expert_name, expert_org, payload, submission_id
+               FROM submissions WHERE synced = 0 AND survey = ? ORDER BY timestamp LIMIT ?""",
+            (survey_id, -1 if limit is None else limit),
+        )
+        return [(row[0], list(row[1:])) for row in rows]
+
+    def mark_synced(self, submission_ids):
+        with self._lock:
+            self._conn.executemany(
+                "UPDATE submissions SET synced = 1 WHERE submission_id = ?",
+                [(s,) for s in submission_ids],
+            )
+
+    def export_jsonl(self, path):
+        """Tüm kayıtları Sheets sütun sırasıyla, sonuna anket kimliği eklenmiş JSON Lines olarak dışa aktar"""
+        rows = self._query(
+            """SELECT timestamp, expert_name, expert_org, payload, submission_id, survey
+               FROM submissions ORDER BY timestamp""")
+        with open(path, "w", encoding="utf-8") as f:
+            for row in rows:
+                f.write(json.dumps(list(row), ensure_ascii=False) + "\n")
+        return len(rows)
+
+    def import_legacy_files(self, pattern=LEGACY_PATTERN):
+        """Eski tek-dosya yedeklerini depoya taşı; dosya adı kimlik olur"""
+        imported = 0
+        for path in glob.glob(pattern):
+            try:
+                with open(path, encoding="utf-8") as f:
+                    data = json.load(f)
+                self.upsert({
+                    "submission_id": os.path.basename(path),
+                    "timestamp": data["timestamp"].replace("T", " ")[:19],
+                    "expert_name": data["expert_name"],
+                    "expert_org": data.get("expert_org", ""),
+                    "responses": data["responses"],
+                })
+                imported += 1
+            except (OSError, ValueError, KeyError) as e:
+                print(f"Eski yedek okunamadı ({path}): {e}")
+        return imported
+
+
+@lru_cache(maxsize=None)
+def get_store():
+    """Süreç genelinde tek depo bağlantısı"""
+    return SubmissionStore()
+
+
+def save_record_locally(record):
+    """Yedek: yerel depoya kaydet"""
+    try:
+        with timed("local_save"):
+            get_store().upsert(record)
+        return True
+
+    except Exception as e:
+        print(f"Local kayıt hatası: {e}")
+        return False
+
+
+def replay_to_sheets(worksheet, store=None, batch_size=50, survey_id=DEFAULT_SURVEY):
+    """Anketin bekleyen yerel kayıtlarını toplu append_rows ile Sheets'e aktar"""
+    store = store or get_store()
+    replayed = 0
+    while True:
+        pending = store.pending(batch_size, survey_id)
+        if not pending:
+            return replayed
+        worksheet.append_rows([row for _, row in pending], value_input_option="RAW")
+        store.mark_synced([submission_id for submission_id, _ in pending])
+        replayed += len(pending)
+
+
+if __name__ == "__main__":
+    import sys
+
+    # Kullanım: python storage.py export dosya.jsonl | import-legacy | replay [anket]
+    command = sys.argv[1] if len(sys.argv) > 1 else ""
+    if command == "export":
+        print(f"{get_store().export_jsonl(sys.argv[2])} kayıt dışa aktarıldı")
+    elif command == "import-legacy":
+        print(f"{get_store().import_legacy_files()} eski yedek aktarıldı")
+    elif command == "replay":
+        from criteria import load_survey
+        from sheets import get_worksheet
+        import streamlit as st
+
+        survey = load_survey(sys.argv[2] if len(sys.argv) > 2 else DEFAULT_SURVEY)
+        spreadsheet_id = survey.spreadsheet_id or st.secrets["spreadsheet_id"]
+        worksheet = get_worksheet(spreadsheet_id, dict(st.secrets["gcp_service_account"]))
+        print(f"{replay_to_sheets(worksheet, survey_id=survey.survey_id)} kayıt Sheets'e aktarıldı")
+    else:
+        print("Kullanım: python storage.py export <dosya.jsonl> | import-legacy | replay [anket]")